@@ -18,8 +18,9 @@
 
 
 import pandas as pd
+from yt_trending import load_cached
 
-data = pd.read_csv('FRvideos.csv')
+data = load_cached('FRvideos.csv')
 
 
 # There are some useful features in pandas to take a look at a data frame. The method **head()** is one of them that as an argument accepts the number of rows to be desplayed from the top of the dataframe. In below, I illustrate the first 15 lines of the dataframe.
@@ -54,6 +55,26 @@ data.shape
 data.info()
 
 
+# Note that the data frame is not loaded with the default types of **read_csv**. By default, every count would be an int64 and every text column a string object, which takes several times the size of the file in memory. The data frame is read with an explicit schema: the channel names and category ids are stored as categoricals, the counts as unsigned integers that are just big enough, and the two date columns are parsed to dates. Parsing the csv file is slow, so **load_cached** keeps the parsed data frame in a binary file (```FRvideos.feather```) next to the csv file, and reads it from there as long as the csv file has not changed. The function **memory_report** compares the memory of every column with what the plain **read_csv** would have used.
+
+# In[6]:
+
+
+from yt_trending import memory_report
+
+memory_report('FRvideos.csv')
+
+
+# Most of the remaining memory is taken by the three text columns ```title```, ```tags``` and ```description```. They can also be kept in Arrow memory instead of python strings, and as Arrow dictionaries they store each distinct text once, since a video that is trending for several days repeats the same texts on each of its rows. The function **text_memory_report** compares the three ways to store them, and **load_cached('FRvideos.csv', text = 'dictionary')** loads the data frame with the smallest one.
+
+# In[6]:
+
+
+from yt_trending.loader import text_memory_report
+
+text_memory_report('FRvideos.csv')
+
+
 # The method **info( )** for the dataframe **data** displays the 16 columns, the number of values which are not null, and the type of objects as **Dtype** . Speaking of which, the more frequent data types or dtype in pandas are objects (including strings), int64(to represent integer values), float64(to represent foalt values), and bool which is used for boolean values. Another important feature to access the names of columns in the dataframe and to manipulate them is the attribute columns. I will use it in the feature to manipulate the column names. In the following this attribute is used to extract the column names of the data frame data.
 
 # In[7]:
@@ -136,10 +157,12 @@ most_popular_videos
 
 
 
-channels = most_popular_videos['channel_title']
+channels = most_popular_videos['channel_title'].cat.remove_unused_categories()
 channels
 
 
+# Since the column ```channel_title``` is categorical, I have removed the channels that do not appear in the 50 videos. Otherwise **value_counts** would also list them, with a frequency of zero.
+
 # Normally, histograms are the best choice to visualize the number of times that specific things happen in a given set of data, however, It seems to me that the **bars** can be an appropriate choice to represent the frequency of youtube channels in this example. There are two reasons for that. The first reason is that histogram is normally used to count the frequency in interals while, in this example, there is no internals, and we need frequency of unique values(youtube channels). The second reason is that I can easily extract the frequency of values used in a pandas series (dataframe columns) using the method **value_counts** . 
 
 # In[14]:
@@ -170,6 +193,17 @@ plt.ylabel('Name of top youtube channels')
 plt.show()
 
 
+# Note that a video that is trending for several days has one row for each of these days in the data frame, so the same video can appear several times among the 50 videos with the most comments. To count every video only once, I can keep only the last day each video was trending. The class **SnapshotIndex** finds these rows, and its method **nlargest** works like the one of the data frame:
+
+# In[17]:
+
+
+from yt_trending.snapshots import SnapshotIndex
+
+latest_snapshots = SnapshotIndex(data, keep = 'latest')
+latest_snapshots.nlargest(50, 'comment_count')['channel_title'].value_counts().loc[lambda counts: counts > 0]
+
+
 # ## Correlation between the number of views and number of comments
 
 # In the previous section, we have considered videos with more comments as "popular ones". Let's assume the popularity of a video is considered based on the number of likes that it has, and I want to analyse the behavior of viewers in commenting a video. I will do this analyse by calculating the percentage of comments for a video. 
@@ -201,12 +235,15 @@ data
 
 # Note that the attribute **inplace** is a common attribute in many of the  methods that manipulate dataframes, and the pilosophy behind that is to avoid unwanted changes in dataframes, and so to avoid errors.
 
-# Since the dataframe has changed a little bit so far, I am again going to extract the twenty rows with the largest numbers of comment.
+# Since the dataframe has changed a little bit so far, I am again going to extract the twenty rows with the largest numbers of comment. Since I will need more than the first twenty rows later on, I rank the rows by likes once using **RankedIndex**, and take the twenty first rows of the ranking with its method **top**.
 
 # In[26]:
 
 
-most_popular_videos = data.nlargest(20,'likes')
+from yt_trending.ranking import RankedIndex
+
+likes_ranking = RankedIndex(data, by = ['likes'], ascending = False)
+most_popular_videos = likes_ranking.top(20)
 
 
 # In[27]:
@@ -217,13 +254,12 @@ most_popular_videos
 
 # Based on the values of **VCP** column, it seems that the percentage of viewers who commented a video somehow corresponds to the popularity of the video, which is logical to me. To validate it, I am going to compare this percentage to the same value for the third 20 most popular videos.
 
-# To find these values, one way is to first sort the dataframe in descending order, and to select the rows from 40 to 60.
+# To find these values, one way is to first sort the dataframe in descending order, and to select the rows from 40 to 60. However, the data frame has already been ranked by likes in **likes_ranking**, which only keeps the order of the rows and not a sorted copy of the data frame. So I can directly ask it for the rows ranked from 40 to 60, which gives the same rows as ```data.sort_values(by = ['likes'], ascending = False).iloc[40:60]``` without sorting the data frame again.
 
 # In[28]:
 
 
-sorted_data = data.sort_values(by = ['likes'], ascending = False)
-third_twenty_popular_videos = sorted_data.iloc[40:60]
+third_twenty_popular_videos = likes_ranking.window(40, 60)
 
 
 # In order to be able to compare the values between the first 20 popular videos and third ones, I am going to plot them using scatter plots. 
@@ -269,6 +305,53 @@ plt.show()
 # As it is expected, in the first scatter plot which relates to the first twenty most populer videos on youtube, there are more of yellowish and lightened circles. This is because apparently most popular videos attract more attention and motivates the viewers to leave a comment. Still in the same scatter plot, yellowish circles are concentrated more close to the diagonal line. Note that the diagonal line indicates the imaginary videos with the same number of likes as the number of views. 
 # Also, at the first glace it seems not possible to have the circles below the diagonal line (by the interpretation that the number of likes is more than the number of views for a video!!). However, note that the scales of the horizontal line (1e6) and the vertical line(1e8) refer to different scientific notations. In the second scatter plot, which is for the third twenty popular videos, the circles seems to be darker which means viewers were less eager to leave comments.
 
+# The two scatter plots only show twenty videos each. Scattering all the videos of the data frame would be very slow and would give a big blob of circles. Instead, I can split the likes and views (in logarithmic scale) into a grid of small cells, and colour each cell by the mean VCP of the videos that fall in it. The class **DensityGrid** computes this grid, and I draw the twenty most popular videos and the diagonal line on top of it.
+
+# In[31]:
+
+
+from yt_trending.density import DensityGrid
+from yt_trending.plots import plot_likes_views_density
+
+plot_likes_views_density(DensityGrid.from_frame(data), overlay = most_popular_videos)
+
+
+# The colours give an idea, but the correlation between the views and the comments can also be measured. The function **correlations** computes the Pearson (or Spearman, on the ranks) correlations between the views, likes, dislikes and comments of all the videos, and **grouped_correlations** computes them for every youtube channel (or category) at once, without a loop over the channels.
+
+# In[32]:
+
+
+from yt_trending.correlation import bootstrap_intervals, correlations, grouped_correlations
+
+correlations(data, method = 'spearman')
+
+
+# In[33]:
+
+
+channel_correlations = grouped_correlations(data, by = 'channel_title')
+channel_correlations.sort_values('videos', ascending = False).head(10)
+
+
+# To know how much these correlations could change with another sample of videos, **bootstrap_intervals** gives them with a 95% confidence interval.
+
+# In[34]:
+
+
+bootstrap_intervals(data, resamples = 200)
+
+
+# The numbers of views, likes and comments of a video keep growing while it is trending, so a video that stayed on the list for a long time has more chances to be among the twenty most liked ones. The class **Trajectories** follows every video from one trending day to the next: for each video, it gives the number of days it was trending and the largest daily gain of views, likes and comments. I can join these values to the twenty most popular videos using their ```video_id```.
+
+# In[31]:
+
+
+from yt_trending.trajectory import Trajectories
+
+trajectories = Trajectories(data)
+most_popular_videos.join(trajectories.summary, on = 'video_id')[['title', 'VCP', 'days_trending', 'longest_run', 'views_peak_gain', 'comment_count_peak_gain']]
+
+
 # ## Frequency of tagging words used in videos.
 
 # Now, let's imagine the popular videos are those with higher numbers of comments. In our data frame, there is a column called tags, which indicates the words that are used to tag a video. These tags have an important role in attracting the viewers. So, it would be nice to see which tagging words cause to attract more viewers. There are different ways to do that. I am going to start with a way, which is not really the favorit way to do it in pandas, and then I will present another way with is more appropriate.
@@ -454,6 +537,39 @@ plt.show()
 
 # At is it given, the result of the second approach is the same as that of the first approach, with mush less coding.
 
+# Both approaches still end with a python loop over the rows to update the ```Counter```, which becomes slow when the data frame has millions of rows. The function **count_tags** does the same lowercasing, splitting and counting on the whole column at once, and returns a pandas Series sorted in the same order as **most_common**.
+
+# In[54]:
+
+
+from yt_trending.tags import count_tags
+
+tag_counts = count_tags(data['tags'])
+print(list(tag_counts.head(15).items()))
+
+
+# The most frequent tags are not necessarily the ones that attract more viewers. To find those, I need the sum of the views of all the videos that use each tag. The class **TagMatrix** builds, once, a sparse matrix with a row for each video and a column for each tag, so that these sums are computed in one matrix product instead of a loop over the rows.
+
+# In[55]:
+
+
+from yt_trending.incidence import TagMatrix
+
+tag_matrix = TagMatrix(data, by_video = True)
+tag_matrix.engagement(data).head(15)
+
+
+# To answer a question like "which videos are tagged with the most common tag and have more than 1000 comments", the tags of every video would again be split and searched with **str.contains**. The class **InvertedIndex** splits the tags and the words of the titles once, and keeps for every word the sorted positions of the rows it appears in, so that such questions are answered in milliseconds.
+
+# In[56]:
+
+
+from yt_trending.search import InvertedIndex
+
+index = InvertedIndex(data)
+rows = index.search(tags = [tag_counts.index[0]], where = ['comment_count > 1000'])
+index.take(rows, ['title', 'channel_title', 'comment_count']).head()
+
 # ## The number of videos published by each channel
 
 # One functionality of pandas, is to group a dataframe based on a specific parameter. For instance, in the dataframe of youtube videos, it might be helpful to group the information based on youtube channels. In this case, I can count, for example, the number of videos published by a channel, or verify which channel is more popular based on the number of comments it has received. To group the information, there is a method called **groupby( )**. Let's again overview the dataframe **data**.
@@ -469,7 +585,7 @@ data
 # In[56]:
 
 
-channel_group = data.groupby(['channel_title'])
+channel_group = data.groupby(['channel_title'], observed = True)
 
 
 # Using the attribute **groups**, I can retrieve a dictionary whose keys are the name of groups and whose values are the labels to those groups.
@@ -566,6 +682,36 @@ data_concat
 data_concat.loc['Troom Troom FR']['percentage']
 
 
+# Using **apply** with a lambda function is easy to write, but pandas calls the lambda function once for each youtube channel, and builds a small Series for each of them. With hundreds of thousands of channels this takes minutes. The function **channel_stats** computes the same table in one pass over the whole column, and it can use several thresholds at the same time:
+
+# In[70]:
+
+
+from yt_trending.channels import channel_stats
+
+channel_stats(data, thresholds = [100, 1000, 10000]).loc['Troom Troom FR']
+
+
+# In this notebook, the number of videos of each channel has been computed three times, and every new question about the channels computes it again. A **ResultCache** keeps such derived results in memory, keyed by the content of the columns they are computed from and by their parameters: asking again returns the stored result, and changing the column ```comment_count``` makes the cache forget the results computed from it.
+
+# In[71]:
+
+
+from yt_trending.channels import channel_counts
+from yt_trending.memo import ResultCache
+
+results = ResultCache(max_bytes = '64MB')
+results(channel_counts, data, columns = ['channel_title']).head()
+
+
+# In[72]:
+
+
+results(channel_stats, data, columns = ['channel_title', 'comment_count'], thresholds = [1000])
+results(channel_stats, data, columns = ['channel_title', 'comment_count'], thresholds = [1000])
+results.stats()
+
+
 # In[ ]:
 
 
@@ -0,0 +1,26 @@
+"""Analyses of the youtube trending-videos dumps, usable outside the notebook.
+
+Submodules are imported on first use, so that ``import yt_trending`` and the
+command line interface do not pay for the modules they do not need.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'iter_videos': 'loader',
+    'load_videos': 'loader',
+    'memory_report': 'loader',
+    'text_memory_report': 'loader',
+    'load_cached': 'cache',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module('.' + _EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
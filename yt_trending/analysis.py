@@ -0,0 +1,43 @@
+"""The numeric analyses of the notebook, as functions of the data frame.
+
+None of these functions adds columns to the frame or builds sorted copies of
+it: they return the (small) result tables only.
+"""
+
+import numpy as np
+
+from .profiling import profiled
+from .ranking import RankedIndex, top_positions
+
+
+def vcp(frame):
+    """Return the views comment count percentage of every row."""
+    return frame['comment_count'] / frame['views'] * 100
+
+
+@profiled()
+def vcp_summary(frame):
+    """Return the descriptive statistics of the finite VCP values of ``frame``."""
+    values = vcp(frame)
+    return values[np.isfinite(values)].describe().rename('VCP')
+
+
+@profiled()
+def top_videos(frame, k=10, by='comment_count', ascending=False, start=0, columns=None, index=None):
+    """Return the videos ranked ``start`` to ``start + k`` by the columns ``by``.
+
+    ``top_videos(data, 10)`` is ``data.nlargest(10, 'comment_count')``, and
+    ``top_videos(data, 20, by='likes', start=40)`` the third twenty most
+    liked videos. The VCP of the returned rows is added as a last column.
+    ``index`` is a :class:`RankedIndex` of ``frame`` by ``by`` and
+    ``ascending``, to reuse instead of sorting the frame again.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if index is not None:
+        positions = index.positions(start, start + k)
+    elif len(by) == 1 and start == 0 and isinstance(ascending, bool):
+        positions = top_positions(frame[by[0]].to_numpy(), k, ascending=ascending)
+    else:
+        positions = RankedIndex(frame, by, ascending).positions(start, start + k)
+    rows = frame.iloc[positions] if columns is None else frame[list(columns)].iloc[positions]
+    return rows.assign(VCP=vcp(frame[['comment_count', 'views']].iloc[positions]))
@@ -0,0 +1,102 @@
+"""Running the analyses over the dumps of several countries in parallel.
+
+Every country file (``FRvideos.csv``, ``USvideos.csv``, ...) is processed in
+its own worker process: the worker loads the file, computes the top videos,
+the VCP summary, the tag counts and the channel statistics, and writes them to
+``<output>/<country>/``. Only these small result tables go back to the parent
+process, never the data frames; the parent then adds up the per-channel and
+per-tag results of all countries into ``<output>/all/``.
+
+Usage::
+
+    python -m yt_trending.batch data/*videos.csv --output results --workers 8
+"""
+
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .analysis import vcp_summary
+from .cache import load_cached
+from .channels import channel_stats, merge_channel_stats
+from .ranking import RankedIndex
+from .store import TOP_COLUMNS
+from .tags import count_tags, merge_tag_counts
+
+FILE_SUFFIX = 'videos.csv'
+MERGED_DIRECTORY = 'all'
+
+
+def country_of(path):
+    """Return the country code of a dump, e.g. ``FR`` for ``data/FRvideos.csv``."""
+    name = os.path.basename(path)
+    if name.endswith(FILE_SUFFIX):
+        return name[:-len(FILE_SUFFIX)]
+    return os.path.splitext(name)[0]
+
+
+def find_country_files(directory):
+    """Return the ``*videos.csv`` files of ``directory``, sorted by name."""
+    return sorted(glob.glob(os.path.join(directory, '*' + FILE_SUFFIX)))
+
+
+def analyse_country(path, output, k=50, thresholds=(1000,)):
+    """Run every analysis on one country file and write its result tables.
+
+    Returns the country code, the number of rows, the channel statistics and
+    the tag counts, which are merged over countries by :func:`run_batch`.
+    """
+    country = country_of(path)
+    directory = os.path.join(output, country)
+    os.makedirs(directory, exist_ok=True)
+    data = load_cached(path)
+
+    ranking = RankedIndex(data, by=['comment_count', 'likes'], ascending=False)
+    ranking.top(k)[TOP_COLUMNS].to_csv(os.path.join(directory, 'top_comment_count.csv'), index=False)
+    vcp_summary(data).to_csv(os.path.join(directory, 'vcp.csv'))
+    tags = count_tags(data['tags'])
+    tags.to_csv(os.path.join(directory, 'tags.csv'))
+    channels = channel_stats(data, thresholds=thresholds)
+    channels.to_csv(os.path.join(directory, 'channels.csv'))
+    return country, len(data), channels, tags
+
+
+def run_batch(paths, output, workers=None, k=50, thresholds=(1000,)):
+    """Analyse the country files ``paths`` in a pool of ``workers`` processes.
+
+    Writes the per-country tables, then the channel statistics and tag counts
+    merged over all countries, and returns the merged ``(channels, tags)``.
+    """
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(analyse_country, path, output, k, thresholds) for path in paths]
+        results = [future.result() for future in futures]
+
+    directory = os.path.join(output, MERGED_DIRECTORY)
+    os.makedirs(directory, exist_ok=True)
+    channels = merge_channel_stats([result[2] for result in results], thresholds=thresholds)
+    tags = merge_tag_counts([result[3] for result in results])
+    channels.to_csv(os.path.join(directory, 'channels.csv'))
+    tags.to_csv(os.path.join(directory, 'tags.csv'))
+    return channels, tags
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+',
+                        help='country csv files, or directories holding *videos.csv files')
+    parser.add_argument('--output', '-o', default='results')
+    parser.add_argument('--workers', '-j', type=int, default=None)
+    parser.add_argument('--top', '-k', type=int, default=50)
+    parser.add_argument('--threshold', '-t', type=int, action='append', dest='thresholds')
+    args = parser.parse_args(argv)
+    paths = []
+    for path in args.paths:
+        paths.extend(find_country_files(path) if os.path.isdir(path) else [path])
+    run_batch(paths, args.output, workers=args.workers, k=args.top,
+              thresholds=args.thresholds or (1000,))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Timing and memory of every analysis stage, on synthetic data.
+
+Every stage of the notebook (loading, sorting, VCP, tag counting, channel
+statistics) is run with the notebook code and with the functions of this
+package, on synthetic dumps of the requested sizes (see
+:mod:`yt_trending.synthetic`). For each run, the best wall time over a few
+repeats and the peak memory traced by ``tracemalloc`` during one extra run
+are appended as json lines to a results file, and compared with the last
+recorded run of the same stage, implementation and size, so that regressions
+show up.
+
+Usage::
+
+    python -m yt_trending.bench --rows 40724 --rows 1000000 --output bench_results.jsonl
+
+``tracemalloc`` sees the allocations of python and numpy, not the Arrow
+buffers used by the cache and the tag counting.
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .analysis import vcp_summary
+from .cache import load_cached
+from .channels import channel_stats
+from .loader import load_videos
+from .ranking import RankedIndex
+from .synthetic import write_csv
+from .tags import count_tags
+
+DEFAULT_OUTPUT = 'bench_results.jsonl'
+DEFAULT_TOLERANCE = 0.2
+
+
+def _notebook_sort(data):
+    sorted_data = data.sort_values(by=['comment_count', 'likes'], ascending=False)
+    return sorted_data.head(50), sorted_data.iloc[40:60]
+
+
+def _ranked_sort(data):
+    ranking = RankedIndex(data, by=['comment_count', 'likes'], ascending=False)
+    return ranking.top(50), ranking.window(40, 60)
+
+
+def _notebook_vcp(data):
+    data = data.copy()
+    data['VCP'] = (data['comment_count'] / data['views']) * 100
+    return data['VCP'].describe()
+
+
+def _notebook_tags(data):
+    filt = data['tags'].str.contains('"|"').fillna(False).astype(bool)
+    counter = Counter()
+    for row in data.loc[filt, 'tags'].str.lower().str.split(r'["|"]+'):
+        counter.update(row)
+    del counter['']
+    return counter.most_common(15)
+
+
+def _notebook_channels(data):
+    channel_group = data.groupby(['channel_title'], observed=True)
+    popular = channel_group['comment_count'].apply(lambda x: (x[x > 1000]).count())
+    total = channel_group['comment_count'].apply(lambda x: x.count())
+    table = pd.concat([popular.sort_values(ascending=False), total],
+                      keys=['nbv_comment > 1000', 'Tnbv'], axis='columns')
+    table['percentage'] = (table['nbv_comment > 1000'] / table['Tnbv']) * 100
+    return table
+
+
+# stage -> implementation -> (input, function). The input is the csv path,
+# the frame of the default read_csv, or the frame loaded with the schema.
+STAGES = {
+    'load': {
+        'read_csv': ('path', pd.read_csv),
+        'load_videos': ('path', load_videos),
+        'load_cached': ('path', load_cached),
+    },
+    'sort': {
+        'sort_values': ('default', _notebook_sort),
+        'ranked_index': ('typed', _ranked_sort),
+    },
+    'vcp': {
+        'column': ('default', _notebook_vcp),
+        'vcp_summary': ('typed', vcp_summary),
+    },
+    'tags': {
+        'counter': ('default', _notebook_tags),
+        'count_tags': ('typed', lambda data: count_tags(data['tags']).head(15)),
+    },
+    'channels': {
+        'groupby_apply': ('default', _notebook_channels),
+        'channel_stats': ('typed', channel_stats),
+    },
+}
+
+
+def dataset(rows, directory, seed=0):
+    """Return the path of the synthetic dump of ``rows`` rows, writing it if needed."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'synthetic_%d_%d.csv' % (rows, seed))
+    if not os.path.exists(path):
+        write_csv(path, rows, seed=seed)
+    return path
+
+
+def measure(function, argument, repeat=3):
+    """Return the best wall time of ``repeat`` calls and the traced peak memory of one."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def read_results(path):
+    """Return the records of a results file, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def compare(records, previous, tolerance=DEFAULT_TOLERANCE):
+    """Return ``records`` as a frame, with the previous time of the same run and regressions."""
+    last = {}
+    for record in previous:
+        last[record['stage'], record['implementation'], record['rows']] = record['seconds']
+    table = pd.DataFrame(records)
+    keys = zip(table['stage'], table['implementation'], table['rows'])
+    table['previous'] = [last.get(key, np.nan) for key in keys]
+    table['regression'] = table['seconds'] > table['previous'] * (1 + tolerance)
+    return table
+
+
+def run(rows=(40_724,), stages=None, implementations=None, repeat=3,
+        directory='bench_data', output=DEFAULT_OUTPUT, seed=0, tolerance=DEFAULT_TOLERANCE):
+    """Benchmark ``stages`` (all by default) for every size in ``rows``.
+
+    Appends the records to ``output`` and returns them compared with the
+    previous run, see :func:`compare`.
+    """
+    previous = read_results(output)
+    records = []
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+    for n in rows:
+        path = dataset(n, directory, seed=seed)
+        load_cached(path)
+        inputs = {'path': path, 'default': None, 'typed': None}
+        for stage in stages or STAGES:
+            for name, (kind, function) in STAGES[stage].items():
+                if implementations and name not in implementations:
+                    continue
+                if kind == 'default' and inputs['default'] is None:
+                    inputs['default'] = pd.read_csv(path)
+                if kind == 'typed' and inputs['typed'] is None:
+                    inputs['typed'] = load_videos(path)
+                seconds, peak = measure(function, inputs[kind], repeat=repeat)
+                records.append({'time': stamp, 'stage': stage, 'implementation': name, 'rows': n,
+                                'seconds': seconds, 'peak_bytes': peak,
+                                'python': platform.python_version(), 'pandas': pd.__version__})
+    with open(output, 'a') as handle:
+        for record in records:
+            handle.write(json.dumps(record) + '\n')
+    return compare(records, previous, tolerance)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', '-n', type=int, action='append',
+                        help='size of the synthetic dump, repeat for several sizes')
+    parser.add_argument('--stage', action='append', dest='stages', choices=list(STAGES))
+    parser.add_argument('--implementation', action='append', dest='implementations',
+                        help='only run these implementations, e.g. to skip the slow notebook code')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data', default='bench_data', help='directory of the synthetic dumps')
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+    table = run(rows=args.rows or [40_724], stages=args.stages, implementations=args.implementations,
+                repeat=args.repeat, directory=args.data, output=args.output,
+                tolerance=args.tolerance)
+    print(table[['stage', 'implementation', 'rows', 'seconds', 'peak_bytes',
+                 'previous', 'regression']].to_string(index=False))
+    return 1 if table['regression'].any() else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
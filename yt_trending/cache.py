@@ -0,0 +1,166 @@
+"""Columnar on-disk cache of the parsed csv.
+
+The first load writes the typed frame as an uncompressed Feather file next to
+the csv, together with a small json file holding the fingerprint of the csv it
+was built from. Later loads memory-map the Feather file instead of parsing the
+csv again. The cache is rebuilt when the size of the csv changes, or when its
+mtime changes and its content hash no longer matches (a plain ``touch`` keeps
+the cache).
+
+Feather support comes from pyarrow. Without it, :func:`load_cached` simply
+falls back to :func:`~yt_trending.loader.load_videos`.
+"""
+
+import hashlib
+import json
+import os
+
+from .loader import COLUMNS, TEXT_COLUMNS, apply_text_storage, load_videos, sort_categories, text_series
+from .profiling import profiled
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    pa = feather = None
+
+# Bump when the loader schema changes, so that old caches are not reused.
+SCHEMA_VERSION = 1
+
+_HASH_BLOCK = 1 << 20
+
+
+def cache_paths(path):
+    """Return the paths of the Feather file and its metadata for csv ``path``."""
+    root, _ = os.path.splitext(path)
+    return root + '.feather', root + '.feather.json'
+
+
+def content_hash(path):
+    """Return the sha256 hex digest of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path, with_hash=True):
+    """Return the size, mtime and (optionally) content hash of ``path``."""
+    stat = os.stat(path)
+    key = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+           'schema': SCHEMA_VERSION}
+    if with_hash:
+        key['sha256'] = content_hash(path)
+    return key
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(path):
+    """Tell whether the cache of the csv ``path`` can be used as it is."""
+    data_path, meta_path = cache_paths(path)
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(data_path):
+        return False
+    current = fingerprint(path, with_hash=False)
+    if current['size'] != meta['size'] or current['schema'] != meta['schema']:
+        return False
+    if current['mtime_ns'] == meta['mtime_ns']:
+        return True
+    if content_hash(path) != meta['sha256']:
+        return False
+    # Same content under a new mtime: remember it to skip hashing next time.
+    meta['mtime_ns'] = current['mtime_ns']
+    _write_json(meta_path, meta)
+    return True
+
+
+def _write_json(meta_path, meta):
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as handle:
+        json.dump(meta, handle)
+    os.replace(tmp_path, meta_path)
+
+
+@profiled()
+def write_cache(path, frame=None):
+    """Write the cache of the csv ``path`` and return the typed frame.
+
+    ``frame`` must hold all the columns of the csv, loaded with the schema of
+    :mod:`yt_trending.loader`; it is loaded when not given.
+    """
+    if feather is None:
+        raise ImportError('the columnar cache needs pyarrow')
+    key = fingerprint(path)
+    if frame is None:
+        frame = load_videos(path)
+    data_path, meta_path = cache_paths(path)
+    tmp_path = data_path + '.tmp'
+    feather.write_feather(frame.reset_index(drop=True), tmp_path,
+                          compression='uncompressed')
+    os.replace(tmp_path, data_path)
+    _write_json(meta_path, key)
+    return frame
+
+
+def map_table(path, columns=None):
+    """Return the cached table of the csv ``path``, with only ``columns`` when given.
+
+    The buffers of the table point into the memory-mapped Feather file:
+    nothing is read until they are used, and then only the pages of the
+    columns used. (``feather.read_table`` copies the whole file instead,
+    even with ``memory_map=True``.)
+    """
+    data_path, _ = cache_paths(path)
+    table = pa.ipc.open_file(pa.memory_map(data_path)).read_all()
+    return table if columns is None else table.select(list(columns))
+
+
+@profiled()
+def read_cache(path, usecols=None, text=None):
+    """Memory-map the cached frame of the csv ``path``, without freshness checks.
+
+    With ``text='arrow'`` the text columns point into the memory-mapped file
+    instead of being copied to python strings.
+    """
+    columns = None if usecols is None else [c for c in COLUMNS if c in usecols]
+    table = map_table(path, columns)
+    # The dictionaries of the record batches are unified in order of appearance.
+    if text not in ('arrow', 'dictionary'):
+        return apply_text_storage(sort_categories(table.to_pandas(split_blocks=True)), text)
+    text_columns = [c for c in table.column_names if c in TEXT_COLUMNS]
+    frame = sort_categories(table.drop(text_columns).to_pandas(split_blocks=True))
+    for column in text_columns:
+        frame[column] = text_series(table[column], text, index=frame.index, name=column)
+    return frame[table.column_names]
+
+
+@profiled()
+def load_cached(path, usecols=None, refresh=False, text=None):
+    """Load the csv ``path`` through its columnar cache.
+
+    The cache is (re)built when missing, stale, or when ``refresh`` is true.
+    ``text`` is the storage of the text columns, see
+    :func:`~yt_trending.loader.load_videos`.
+    """
+    if feather is None:
+        return load_videos(path, usecols=usecols, text=text)
+    if refresh or not is_fresh(path):
+        frame = write_cache(path)
+        if usecols is None:
+            return apply_text_storage(frame, text)
+    return read_cache(path, usecols=usecols, text=text)
+
+
+def clear_cache(path):
+    """Remove the cache files of the csv ``path``, if any."""
+    for cache_path in cache_paths(path):
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
@@ -0,0 +1,114 @@
+"""Per-channel statistics in one vectorized pass.
+
+The notebook computes the number of videos of every channel with more than
+1000 comments with ``channel_group['comment_count'].apply(lambda x: ...)``,
+which calls a python function and builds a sub-Series for every channel.
+Here every row is mapped to the integer code of its channel once, and the
+counts are ``np.bincount`` of those codes, filtered by each threshold.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+TOTAL_COLUMN = 'Tnbv'
+
+
+def _group_codes(keys):
+    """Return the integer code of every row and the sorted group labels, like ``groupby``.
+
+    The categories of a categorical column are not necessarily sorted (after
+    a ``concat`` or ``set_categories`` for instance); their codes are then
+    renumbered in the sorted order of the labels, so that groups, and the
+    ties of the tables built from them, are in the order of their labels
+    whatever the storage of the column.
+    """
+    if not isinstance(keys.dtype, pd.CategoricalDtype):
+        return pd.factorize(keys, sort=True)
+    codes, labels = keys.cat.codes.to_numpy(), keys.cat.categories
+    if not labels.is_monotonic_increasing:
+        order = labels.argsort()
+        renumbered = np.empty(len(order), dtype=codes.dtype)
+        renumbered[order] = np.arange(len(order))
+        codes = np.where(codes >= 0, renumbered[codes], -1).astype(codes.dtype)
+        labels = labels[order]
+    return codes, labels
+
+
+def count_column(column, threshold):
+    """Return the name of the column counting the videos above ``threshold``."""
+    return 'nbv_%s > %s' % (column.replace('_count', ''), threshold)
+
+
+def channel_counts(frame, by='channel_title'):
+    """Return the number of rows of every channel, largest first.
+
+    This is ``data['channel_title'].value_counts()``, without the channels of
+    a categorical column that have no row, and with the channels of the same
+    count in the order of their names.
+    """
+    codes, labels = _group_codes(frame[by])
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    present = np.flatnonzero(counts)
+    order = present[np.argsort(-counts[present], kind='stable')]
+    return pd.Series(counts[order], index=pd.Index(labels[order], name=by), name='count')
+
+
+@profiled()
+def channel_stats(frame, thresholds=(1000,), column='comment_count', by='channel_title'):
+    """Return, for every channel, how many of its videos are above each threshold.
+
+    The result has one ``nbv_comment > t`` column per threshold, the total
+    number of videos ``Tnbv``, and the percentage of videos above the
+    threshold: a ``percentage`` column for a single threshold, as in the
+    ``data_concat`` table of the notebook, and one ``percentage > t`` column
+    per threshold otherwise. Rows are sorted by the count above the first
+    threshold, largest first, and channels of the same count by name.
+    """
+    thresholds = list(np.atleast_1d(thresholds))
+    codes, labels = _group_codes(frame[by])
+    values = frame[column].to_numpy()
+    valid = codes >= 0
+    has_value = valid & pd.notna(values)
+    # Channels with at least one row, whether or not the value is missing.
+    present = np.flatnonzero(np.bincount(codes[valid], minlength=len(labels)))
+    totals = np.bincount(codes[has_value], minlength=len(labels))
+
+    above = {}
+    for threshold in thresholds:
+        mask = has_value.copy()
+        mask[has_value] = values[has_value] > threshold
+        above[threshold] = np.bincount(codes[mask], minlength=len(labels))
+
+    table = pd.DataFrame({count_column(column, t): above[t][present] for t in thresholds},
+                         index=pd.Index(labels[present], name=by))
+    table[TOTAL_COLUMN] = totals[present]
+    return with_percentages(table, thresholds, column)
+
+
+def with_percentages(table, thresholds, column='comment_count'):
+    """Add the percentage columns to a table of counts and sort it.
+
+    ``table`` holds the ``count_column(column, t)`` columns and ``Tnbv``;
+    channels are sorted by the count above the first threshold, largest
+    first, keeping the current order for ties.
+    """
+    thresholds = list(np.atleast_1d(thresholds))
+    for t in thresholds:
+        name = 'percentage' if len(thresholds) == 1 else 'percentage > %s' % t
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table[name] = table[count_column(column, t)] / table[TOTAL_COLUMN] * 100
+    return table.sort_values(count_column(column, thresholds[0]), ascending=False, kind='stable')
+
+
+def merge_channel_stats(tables, thresholds=(1000,), column='comment_count'):
+    """Combine the :func:`channel_stats` tables of several datasets.
+
+    Counts of the same channel are added and the percentages recomputed.
+    """
+    thresholds = list(np.atleast_1d(thresholds))
+    counts = [count_column(column, t) for t in thresholds] + [TOTAL_COLUMN]
+    merged = pd.concat([table[counts] for table in tables])
+    merged = merged.groupby(level=0, sort=True).sum()
+    return with_percentages(merged, thresholds, column)
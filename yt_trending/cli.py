@@ -0,0 +1,271 @@
+"""Command line interface of the analyses.
+
+Usage::
+
+    python -m yt_trending top FRvideos.csv -k 50 --by comment_count
+    python -m yt_trending top FRvideos.csv -k 20 --by likes --start 40 --plot third.png
+    python -m yt_trending top FRvideos.csv -k 20 --by likes --density density.png
+    python -m yt_trending vcp FRvideos.csv
+    python -m yt_trending tags FRvideos.csv -k 15
+    python -m yt_trending channels FRvideos.csv -t 1000 --channel 'Troom Troom FR'
+    python -m yt_trending corr FRvideos.csv --by channel_title --method spearman
+    python -m yt_trending search FRvideos.csv --tag humour --where 'comment_count > 1000'
+    python -m yt_trending info FRvideos.csv --memory
+    python -m yt_trending info FRvideos.csv --text-memory
+    python -m yt_trending tags FRvideos.csv --text dictionary
+    python -m yt_trending report FRvideos.csv -d report -f png -f svg
+    python -m yt_trending batch data/ -o results
+    python -m yt_trending serve FRvideos.csv --port 8765
+    python -m yt_trending --profile stages.json --profile-dump run.prof tags FRvideos.csv
+
+``--profile`` records the time and memory of every analysis stage as json
+(see :mod:`yt_trending.profiling`), and ``--profile-dump`` profiles the whole
+command with cProfile, or pyinstrument for a ``.html`` file.
+
+Only the modules a command needs are imported, and matplotlib only when
+``--plot`` is given, so that numeric-only runs start quickly.
+"""
+
+import argparse
+import sys
+
+
+def _load(args, usecols=None):
+    if args.no_cache:
+        from .loader import load_videos
+        return load_videos(args.path, usecols=usecols, text=args.text)
+    from .cache import load_cached
+    return load_cached(args.path, usecols=usecols, text=args.text)
+
+
+def _emit(args, result):
+    if args.output:
+        result.to_csv(args.output)
+    else:
+        print(result.to_string())
+
+
+def cmd_info(args):
+    if args.memory:
+        from .loader import memory_report
+        _emit(args, memory_report(args.path, text=args.text))
+        return
+    if args.text_memory:
+        from .loader import text_memory_report
+        _emit(args, text_memory_report(args.path))
+        return
+    data = _load(args)
+    print('%d rows x %d columns' % data.shape)
+    data.info(memory_usage='deep')
+
+
+def cmd_top(args):
+    from .analysis import top_videos
+    from .store import SORT_COLUMNS, TOP_COLUMNS
+    unknown = set(args.by or ()) - set(SORT_COLUMNS)
+    if unknown:
+        sys.exit('cannot sort by %s, only by %s'
+                 % (', '.join(sorted(unknown)), ', '.join(SORT_COLUMNS)))
+    data = _load(args, usecols=TOP_COLUMNS)
+    ascending = args.ascending or [False]
+    if len(ascending) == 1:
+        ascending = ascending[0]
+    videos = top_videos(data, k=args.k, by=args.by or ['comment_count'],
+                        ascending=ascending, start=args.start)
+    _emit(args, videos)
+    if args.plot:
+        from .plots import plot_likes_views
+        plot_likes_views(videos, args.plot)
+    if args.density:
+        from .density import DensityGrid
+        from .plots import plot_likes_views_density
+        plot_likes_views_density(DensityGrid.from_frame(data), overlay=videos, path=args.density)
+
+
+def cmd_vcp(args):
+    from .analysis import vcp_summary
+    _emit(args, vcp_summary(_load(args, usecols=['views', 'comment_count'])).to_frame())
+
+
+def cmd_tags(args):
+    from .tags import count_tags
+    counts = count_tags(_load(args, usecols=['tags'])['tags'], method=args.method).head(args.k)
+    _emit(args, counts.to_frame())
+    if args.plot:
+        from .plots import plot_tag_counts
+        plot_tag_counts(counts, args.plot)
+
+
+def cmd_channels(args):
+    from .channels import channel_stats
+    data = _load(args, usecols=['channel_title', 'comment_count'])
+    table = channel_stats(data, thresholds=args.thresholds or [1000])
+    if args.channel:
+        if args.channel not in table.index:
+            sys.exit('unknown channel %r' % args.channel)
+        table = table.loc[[args.channel]]
+    elif args.k:
+        table = table.head(args.k)
+    _emit(args, table)
+    if args.plot:
+        from .plots import plot_channel_frequency
+        plot_channel_frequency(table.iloc[:, 0], args.plot, xlabel='Number of videos with %s' % table.columns[0])
+
+
+def cmd_corr(args):
+    from .correlation import ENGAGEMENT_COLUMNS, bootstrap_intervals, correlations, grouped_correlations
+    data = _load(args, usecols=ENGAGEMENT_COLUMNS + ([args.by] if args.by else []))
+    if args.bootstrap:
+        result = bootstrap_intervals(data, by=args.by, method=args.method, resamples=args.bootstrap,
+                                     confidence=args.confidence)
+    elif args.by:
+        result = grouped_correlations(data, by=args.by, method=args.method)
+        result = result.sort_values('videos', ascending=False).head(args.k or None)
+    else:
+        result = correlations(data, method=args.method)
+    _emit(args, result)
+
+
+def cmd_search(args):
+    from .search import InvertedIndex
+    from .store import STORE_COLUMNS, TOP_COLUMNS
+    index = InvertedIndex(_load(args, usecols=STORE_COLUMNS))
+    rows = index.search(tags=args.tags or (), title=args.title or (), any_tags=args.any_tags or (),
+                        any_title=args.any_title or (), where=args.where or ())
+    print('%d rows' % len(rows), file=sys.stderr)
+    _emit(args, index.take(rows[:args.k] if args.k else rows, TOP_COLUMNS))
+
+
+def cmd_report(args):
+    from .report import render_report, report_tables
+    data = _load(args, usecols=['title', 'channel_title', 'tags', 'views', 'likes', 'comment_count'])
+    rendered = render_report(report_tables(data), args.directory,
+                             formats=args.formats or ['png'], workers=args.workers)
+    print('%d charts rendered' % len(rendered))
+    for path in rendered:
+        print(path)
+
+
+def cmd_serve(args):
+    from .server import serve
+    serve(args.path, host=args.host, port=args.port, socket_path=args.socket,
+          workers=args.workers, reload_interval=args.reload_interval)
+
+
+def cmd_batch(args):
+    from . import batch
+    argv = list(args.paths) + ['--output', args.output, '--top', str(args.top)]
+    if args.workers:
+        argv += ['--workers', str(args.workers)]
+    for threshold in args.thresholds or ():
+        argv += ['--threshold', str(threshold)]
+    batch.main(argv)
+
+
+def _ascending(value):
+    return value.lower() in ('1', 'true', 'yes', 'asc')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='yt_trending', description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', metavar='JSON', help='write the timings of every stage to this file')
+    parser.add_argument('--profile-dump', metavar='FILE',
+                        help='profile the command to this .prof (cProfile) or .html (pyinstrument) file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def command(name, function, help):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument('path', help='trending videos csv, e.g. FRvideos.csv')
+        sub.add_argument('--no-cache', action='store_true', help='parse the csv, ignoring the cache')
+        sub.add_argument('--output', '-o', help='write the result as csv to this file')
+        sub.add_argument('--text', choices=['object', 'arrow', 'dictionary'],
+                         help='storage of the title, tags and description columns')
+        sub.set_defaults(function=function)
+        return sub
+
+    info = command('info', cmd_info, 'shape, types and memory of the dataset')
+    info.add_argument('--memory', action='store_true',
+                      help='compare the memory with the default read_csv')
+    info.add_argument('--text-memory', action='store_true',
+                      help='compare the memory of the text columns as python strings and in Arrow')
+
+    top = command('top', cmd_top, 'videos with the most comments, likes, ...')
+    top.add_argument('-k', type=int, default=10)
+    top.add_argument('--by', action='append', help='sort column, repeat for tie breakers')
+    top.add_argument('--ascending', action='append', type=_ascending,
+                     help='true/false, once or once per --by')
+    top.add_argument('--start', type=int, default=0, help='rank of the first video')
+    top.add_argument('--plot', help='save the likes/views scatter plot to this file')
+    top.add_argument('--density', help='save the likes/views density of all the videos, '
+                                       'with these videos on top, to this file')
+
+    command('vcp', cmd_vcp, 'statistics of the views comment count percentage')
+
+    tags = command('tags', cmd_tags, 'most common tagging words')
+    tags.add_argument('-k', type=int, default=15)
+    tags.add_argument('--method', choices=['regex', 'literal'], default='regex')
+    tags.add_argument('--plot', help='save the bar chart to this file')
+
+    channels = command('channels', cmd_channels, 'videos per channel above comment thresholds')
+    channels.add_argument('--threshold', '-t', type=int, action='append', dest='thresholds')
+    channels.add_argument('-k', type=int, default=20, help='number of channels, 0 for all')
+    channels.add_argument('--channel', help='only show this channel')
+    channels.add_argument('--plot', help='save the bar chart to this file')
+
+    corr = command('corr', cmd_corr, 'correlations of views, likes, dislikes and comments')
+    corr.add_argument('--method', choices=['pearson', 'spearman'], default='pearson')
+    corr.add_argument('--by', choices=['channel_title', 'category_id'], help='one row per group')
+    corr.add_argument('-k', type=int, default=20, help='number of groups shown, 0 for all')
+    corr.add_argument('--bootstrap', type=int, metavar='RESAMPLES',
+                      help='add bootstrap confidence intervals')
+    corr.add_argument('--confidence', type=float, default=0.95)
+
+    search = command('search', cmd_search, 'videos by tag and title words and numeric conditions')
+    search.add_argument('--tag', action='append', dest='tags', help='tag of every video, repeat for AND')
+    search.add_argument('--any-tag', action='append', dest='any_tags', help='tags, at least one of them')
+    search.add_argument('--title', action='append', help='word of every title, repeat for AND')
+    search.add_argument('--any-title', action='append', help='title words, at least one of them')
+    search.add_argument('--where', action='append',
+                        help="condition such as 'comment_count > 1000', repeat for AND")
+    search.add_argument('-k', type=int, default=20, help='number of rows shown, 0 for all')
+
+    report = command('report', cmd_report, 'render every chart to files, without a display')
+    report.add_argument('--directory', '-d', default='report')
+    report.add_argument('--format', '-f', action='append', dest='formats', choices=['png', 'svg'])
+    report.add_argument('--workers', '-j', type=int)
+
+    serve = command('serve', cmd_serve, 'answer json queries over local HTTP, reloading on changes')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--socket', help='listen on this unix socket instead of a port')
+    serve.add_argument('--workers', '-j', type=int, help='threads running the queries')
+    serve.add_argument('--reload-interval', type=float, default=2.0,
+                       help='seconds between checks of the csv, 0 to never reload')
+
+    batch = commands.add_parser('batch', help='run every analysis on several country files')
+    batch.add_argument('paths', nargs='+')
+    batch.add_argument('--output', '-o', default='results')
+    batch.add_argument('--workers', '-j', type=int)
+    batch.add_argument('--top', '-k', type=int, default=50, help='number of top videos kept')
+    batch.add_argument('--threshold', '-t', type=int, action='append', dest='thresholds',
+                       help='comment threshold of the channel table, repeat for several')
+    batch.set_defaults(function=cmd_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not (args.profile or args.profile_dump):
+        args.function(args)
+        return 0
+    from . import profiling
+    profiling.enable(json_path=args.profile, profile_path=args.profile_dump)
+    try:
+        args.function(args)
+    finally:
+        profiling.disable()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""Pearson and Spearman correlations of the engagement counts, overall and per group.
+
+The notebook looks at the correlation between views and comments through the
+VCP colour of forty videos. Here the correlations between ``views``,
+``likes``, ``dislikes`` and ``comment_count`` are computed over every row,
+and for every channel or category at once: rows are mapped to the integer
+code of their group, and the sums of values, squares and products of every
+group are ``np.bincount`` of those codes, weighted by the values. Values are
+first centered on the mean of their group, so that the sums of squares do
+not lose their precision on counts of hundreds of millions. Spearman
+correlations are the Pearson correlations of the ranks within every group,
+with ties given their average rank, as ``Series.rank`` does.
+
+Confidence intervals come from the Poisson bootstrap: every resample gives
+every row a Poisson(1) weight instead of drawing rows, so that resamples of
+the groups are weighted sums like the correlations themselves. Resamples are
+computed in batches whose size follows a memory budget. The intervals are
+percentiles of the resampled correlations when they fit in the budget, and
+Fisher z intervals with the bootstrap standard error otherwise (hundreds of
+thousands of channels), which only need running sums.
+
+Rows with a missing value in one of the columns are left out.
+"""
+
+import itertools
+import warnings
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .channels import _group_codes
+
+ENGAGEMENT_COLUMNS = ['views', 'likes', 'dislikes', 'comment_count']
+METHODS = ('pearson', 'spearman')
+COUNT_COLUMN = 'videos'
+DEFAULT_BUDGET = 256 * 2 ** 20
+# Fewest rows of a group for its correlations to be reported.
+MIN_COUNT = 3
+
+
+def pair_name(first, second):
+    return '%s~%s' % (first, second)
+
+
+def _check_method(method):
+    if method not in METHODS:
+        raise ValueError('method must be one of %s, not %r' % (METHODS, method))
+
+
+def _prepare(frame, columns, by):
+    """Return the float values, group codes, group labels and pairs of column indices."""
+    values = frame[list(columns)].to_numpy(dtype=np.float64)
+    if by is None:
+        codes, labels = np.zeros(len(frame), dtype=np.int64), pd.Index(['all'])
+    else:
+        codes, labels = _group_codes(frame[by])
+        codes = np.asarray(codes, dtype=np.int64)
+    keep = (codes >= 0) & ~np.isnan(values).any(axis=1)
+    if not keep.all():
+        values, codes = values[keep], codes[keep]
+    pairs = list(itertools.combinations(range(len(columns)), 2))
+    return values, codes, labels, pairs
+
+
+class _GroupSums:
+    """Sums per resample and group: ``sum(weights[b] * values)`` over the rows of every group."""
+
+    def __init__(self, codes, n_groups, weights):
+        self.shape = (len(weights), n_groups)
+        self.index = (codes + n_groups * np.arange(len(weights))[:, None]).ravel()
+        self.weights = weights
+
+    def __call__(self, values=None):
+        if self.shape[1] == 1:
+            # A single group: plain (matrix-vector) products.
+            if values is None:
+                return self.weights.sum(axis=1, keepdims=True)
+            if values.ndim == 1:
+                return (self.weights @ values)[:, None]
+            return np.einsum('ij,ij->i', self.weights, values)[:, None]
+        weights = self.weights if values is None else self.weights * values
+        size = self.shape[0] * self.shape[1]
+        return np.bincount(self.index, weights=weights.ravel(), minlength=size).reshape(self.shape)
+
+
+def _group_means(values, codes, n_groups):
+    counts = np.bincount(codes, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.stack([np.bincount(codes, weights=column, minlength=n_groups) / counts
+                         for column in values.T], axis=1)
+
+
+class _RankBlocks:
+    """Sorted order of a column within its groups, and its blocks of equal values."""
+
+    def __init__(self, column, codes):
+        self.order = np.lexsort((column, codes))
+        sorted_codes, sorted_values = codes[self.order], column[self.order]
+        starts = np.ones(len(self.order), dtype=bool)
+        starts[1:] = (sorted_codes[1:] != sorted_codes[:-1]) | (sorted_values[1:] != sorted_values[:-1])
+        self.block_starts = np.flatnonzero(starts)
+        self.block_of_row = np.cumsum(starts) - 1
+        # First block of the group of every block.
+        block_codes = sorted_codes[self.block_starts]
+        new_group = np.ones(len(self.block_starts), dtype=bool)
+        new_group[1:] = block_codes[1:] != block_codes[:-1]
+        self.group_first_block = np.flatnonzero(new_group)[np.cumsum(new_group) - 1]
+
+    def ranks(self, weights):
+        """Return the rank of every row within its group, for every row of ``weights``.
+
+        A row of weight w counts as w copies of the row; copies and equal
+        values share their average rank.
+        """
+        block_weights = np.add.reduceat(weights[:, self.order], self.block_starts, axis=1)
+        before = np.cumsum(block_weights, axis=1) - block_weights
+        block_ranks = before - before[:, self.group_first_block] + (block_weights + 1) / 2
+        ranks = np.empty(weights.shape)
+        ranks[:, self.order] = block_ranks[:, self.block_of_row]
+        return ranks
+
+
+def _correlations(values, codes, n_groups, weights, pairs, means=None, blocks=None):
+    """Return the group sizes (B x G) and the correlations of every pair (B x G x pairs).
+
+    Pearson correlations need the group ``means`` of the values, Spearman
+    ones the rank ``blocks`` of every column.
+    """
+    sums = _GroupSums(codes, n_groups, weights)
+    sizes = sums()
+    if blocks is not None:
+        # Ranks within a group average to (size + 1) / 2 exactly.
+        centre = ((sizes + 1) / 2).ravel()[sums.index].reshape(weights.shape)
+        centred = [column.ranks(weights) - centre for column in blocks]
+    else:
+        centred = [values[:, i] - means[codes, i] for i in range(values.shape[1])]
+    first = [sums(column) for column in centred]
+    result = np.full(sizes.shape + (len(pairs),), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Groups left without rows by a resample have a size of 0.
+        squares = [sums(column * column) - s * s / sizes for column, s in zip(centred, first)]
+        for k, (i, j) in enumerate(pairs):
+            product = sums(centred[i] * centred[j]) - first[i] * first[j] / sizes
+            result[:, :, k] = product / np.sqrt(squares[i] * squares[j])
+    return sizes, np.clip(result, -1, 1)
+
+
+def _statistics(values, codes, n_groups, method):
+    # What _correlations needs besides the weights, computed once for all the resamples.
+    if method == 'spearman':
+        return {'blocks': [_RankBlocks(column, codes) for column in values.T]}
+    return {'means': _group_means(values, codes, n_groups)}
+
+
+def grouped_correlations(frame, by='channel_title', columns=ENGAGEMENT_COLUMNS, method='pearson',
+                         min_count=MIN_COUNT):
+    """Return the correlation of every pair of ``columns`` within every group of ``by``.
+
+    The result has one row per group, the number of rows of the group in a
+    ``videos`` column, and one ``first~second`` column per pair of columns.
+    Correlations are NaN for groups of fewer than ``min_count`` rows and
+    for constant columns. With ``by=None`` the single row ``all`` holds the
+    correlations of the whole frame.
+    """
+    _check_method(method)
+    values, codes, labels, pairs = _prepare(frame, columns, by)
+    sizes, result = _correlations(values, codes, len(labels), np.ones((1, len(codes))), pairs,
+                                  **_statistics(values, codes, len(labels), method))
+    sizes, result = sizes[0], result[0]
+    result[sizes < min_count] = np.nan
+    table = pd.DataFrame(result, index=pd.Index(labels, name=by),
+                         columns=[pair_name(columns[i], columns[j]) for i, j in pairs])
+    table.insert(0, COUNT_COLUMN, sizes.astype(np.int64))
+    return table[table[COUNT_COLUMN] > 0]
+
+
+def correlations(frame, columns=ENGAGEMENT_COLUMNS, method='pearson'):
+    """Return the correlation matrix of ``columns``, like ``frame[columns].corr(method)``."""
+    pairs = grouped_correlations(frame, by=None, columns=columns, method=method, min_count=2)
+    # Without rows the ``all`` row is dropped; its correlations are NaN.
+    pairs = pairs.reindex(['all'])
+    # Like DataFrame.corr, a diagonal of NaN below two rows.
+    diagonal = 1.0 if pairs[COUNT_COLUMN].iloc[0] >= 2 else np.nan
+    matrix = pd.DataFrame(np.eye(len(columns)) * diagonal, index=list(columns), columns=list(columns))
+    for first, second in itertools.combinations(columns, 2):
+        matrix.loc[first, second] = matrix.loc[second, first] = pairs[pair_name(first, second)].iloc[0]
+    return matrix
+
+
+def batch_size(rows, columns, memory_budget=DEFAULT_BUDGET, method='pearson'):
+    """Return how many resamples of ``rows`` rows fit in ``memory_budget``."""
+    # Weights, their group index, the centred columns and their temporaries.
+    arrays = 4 + columns * (3 if method == 'spearman' else 1)
+    return max(1, int(memory_budget // (arrays * 8 * max(rows, 1))))
+
+
+def bootstrap_intervals(frame, by=None, columns=ENGAGEMENT_COLUMNS, method='pearson',
+                        resamples=1000, confidence=0.95, seed=0, memory_budget=DEFAULT_BUDGET,
+                        interval='auto', min_count=MIN_COUNT):
+    """Return the correlations with their bootstrap confidence intervals.
+
+    The result has one row per group (``all`` with ``by=None``) and pair of
+    columns, and the ``correlation``, ``low`` and ``high`` columns.
+    ``interval`` is ``'percentile'``, ``'normal'`` (Fisher z with the
+    bootstrap standard error), or ``'auto'`` to use percentiles when the
+    resampled correlations fit in ``memory_budget``.
+    """
+    _check_method(method)
+    if interval not in ('auto', 'percentile', 'normal'):
+        raise ValueError("interval must be 'auto', 'percentile' or 'normal'")
+    estimates = grouped_correlations(frame, by=by, columns=columns, method=method,
+                                     min_count=min_count)
+    values, codes, labels, pairs = _prepare(frame, columns, by)
+    n_groups = len(labels)
+    statistics = _statistics(values, codes, n_groups, method)
+    if interval == 'auto':
+        stored = resamples * n_groups * len(pairs) * 4
+        interval = 'percentile' if stored <= memory_budget else 'normal'
+
+    rng = np.random.default_rng(seed)
+    size = batch_size(len(codes), len(columns), memory_budget, method)
+    samples = []
+    count = np.zeros((n_groups, len(pairs)))
+    total = np.zeros((n_groups, len(pairs)))
+    total_squares = np.zeros((n_groups, len(pairs)))
+    done = 0
+    while done < resamples:
+        weights = rng.poisson(1.0, (min(size, resamples - done), len(codes))).astype(np.float64)
+        sizes, result = _correlations(values, codes, n_groups, weights, pairs, **statistics)
+        result[sizes < min_count] = np.nan
+        done += len(weights)
+        if interval == 'percentile':
+            samples.append(result.astype(np.float32))
+            continue
+        # Running sums of the Fisher z of the correlations.
+        z = np.arctanh(np.clip(result, -0.999999, 0.999999))
+        finite = np.isfinite(z)
+        count += finite.sum(axis=0)
+        total += np.where(finite, z, 0).sum(axis=0)
+        total_squares += np.where(finite, z * z, 0).sum(axis=0)
+
+    alpha = (1 - confidence) / 2
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        # Groups too small for any resample have all-NaN samples.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if interval == 'percentile':
+            samples = np.concatenate(samples)
+            low, high = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+        else:
+            mean = total / count
+            spread = np.sqrt(np.maximum(total_squares / count - mean * mean, 0) * count / (count - 1))
+            z = NormalDist().inv_cdf(1 - alpha)
+            low, high = np.tanh(mean - z * spread), np.tanh(mean + z * spread)
+
+    names = [pair_name(columns[i], columns[j]) for i, j in pairs]
+    index = pd.MultiIndex.from_product([pd.Index(labels, name=by), pd.Index(names, name='pair')])
+    table = pd.DataFrame({'low': low.ravel(), 'high': high.ravel()}, index=index)
+    correlation = estimates[names].stack()
+    correlation.index.names = index.names
+    table.insert(0, 'correlation', correlation.reindex(index))
+    # Only the groups of grouped_correlations, with enough rows.
+    return table.loc[estimates.index].dropna(subset=['correlation'])
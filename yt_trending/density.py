@@ -0,0 +1,69 @@
+"""Likes x views density grid of the whole dataset, coloured by mean VCP.
+
+Scattering every video is slow and draws a single blob. Instead, likes and
+views are binned on a log scale into a fixed 2-D grid with
+``np.histogram2d``, once for the number of videos and once weighted by their
+VCP, so that every cell gets a count and a mean VCP. The grid has a fixed size
+whatever the number of rows, and since the bin edges do not depend on the
+data, chunks of the dataset can be added one after the other.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .analysis import vcp
+
+DEFAULT_BINS = 200
+# log10(count + 1) ranges of the grid; values outside go to the border cells.
+LIKES_RANGE = (0.0, 8.0)
+VIEWS_RANGE = (0.0, 10.0)
+
+
+class DensityGrid:
+    """Number of videos and sum of their VCP in log-spaced likes x views cells."""
+
+    def __init__(self, bins=DEFAULT_BINS, likes_range=LIKES_RANGE, views_range=VIEWS_RANGE):
+        self.x_edges = np.linspace(*likes_range, bins + 1)
+        self.y_edges = np.linspace(*views_range, bins + 1)
+        self.counts = np.zeros((bins, bins), dtype=np.int64)
+        self.vcp_sums = np.zeros((bins, bins))
+        self.vcp_counts = np.zeros((bins, bins), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, frame, **kwargs):
+        return cls(**kwargs).add(frame)
+
+    def _coordinates(self, values, edges):
+        # Clipping into the range keeps the extreme videos in the border cells.
+        logs = np.log10(np.asarray(values, dtype=np.float64) + 1)
+        return np.clip(logs, edges[0], edges[-1])
+
+    def add(self, frame):
+        """Add the videos of ``frame`` to the grid."""
+        x = self._coordinates(frame['likes'].to_numpy(), self.x_edges)
+        y = self._coordinates(frame['views'].to_numpy(), self.y_edges)
+        edges = [self.x_edges, self.y_edges]
+        counts, _, _ = np.histogram2d(x, y, bins=edges)
+        self.counts += counts.astype(np.int64)
+        ratios = vcp(frame).to_numpy(dtype=np.float64)
+        finite = np.isfinite(ratios)
+        sums, _, _ = np.histogram2d(x[finite], y[finite], bins=edges, weights=ratios[finite])
+        vcp_counts, _, _ = np.histogram2d(x[finite], y[finite], bins=edges)
+        self.vcp_sums += sums
+        self.vcp_counts += vcp_counts.astype(np.int64)
+        return self
+
+    @property
+    def mean_vcp(self):
+        """Mean VCP of every cell, NaN for the cells without videos."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.vcp_counts > 0, self.vcp_sums / self.vcp_counts, np.nan)
+
+    def to_frame(self):
+        """Return the non-empty cells as a table of edges, count and mean VCP."""
+        i, j = np.nonzero(self.counts)
+        return pd.DataFrame({
+            'likes_from': 10 ** self.x_edges[i] - 1, 'likes_to': 10 ** self.x_edges[i + 1] - 1,
+            'views_from': 10 ** self.y_edges[j] - 1, 'views_to': 10 ** self.y_edges[j + 1] - 1,
+            'videos': self.counts[i, j], 'VCP': self.mean_vcp[i, j],
+        })
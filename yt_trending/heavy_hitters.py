@@ -0,0 +1,119 @@
+"""Bounded-memory counting of the most frequent tags and channels.
+
+``c.most_common(15)`` and ``data['channel_title'].value_counts()`` keep a
+counter for every distinct tag and channel, which does not fit in memory for a
+year of dumps from every country. :class:`HeavyHitters` keeps at most
+``capacity`` counters instead, using the mergeable Misra-Gries summary (the
+counterpart of Space-Saving that stores lower bounds instead of upper bounds):
+
+- every chunk of the csv is counted exactly and merged into the summary;
+- when more than ``capacity`` counters remain, the ``capacity + 1``-th largest
+  count is subtracted from all of them, and the counters that drop to zero
+  are removed.
+
+After ``N`` items, every estimate satisfies
+``estimate <= true count <= estimate + error``, with
+``error = (N - sum of estimates) / (capacity + 1) <= N / (capacity + 1)``.
+In particular, any item more frequent than ``N / (capacity + 1)`` is kept.
+
+:class:`ExactCounts` has the same interface and keeps every counter, to check
+the summary against the ``Counter`` results of the notebook.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .loader import DEFAULT_CHUNKSIZE, iter_videos
+from .tags import count_tags
+
+DEFAULT_CAPACITY = 10_000
+
+
+def first_seen_counts(values):
+    """Count ``values`` (missing values excluded) in order of first appearance."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return pd.Series(counts, index=pd.Index(uniques, dtype=object), name='count')
+
+
+def _merge(counts, new_counts):
+    # groupby(sort=False) keeps the items in order of first appearance.
+    merged = pd.concat([counts, new_counts])
+    return merged.groupby(level=0, sort=False).sum().astype(np.int64)
+
+
+def _most_common(counts, k):
+    order = np.argsort(-counts.to_numpy(), kind='stable')
+    if k is not None:
+        order = order[:k]
+    return counts.iloc[order]
+
+
+class ExactCounts:
+    """Exact counts, in the same order as ``collections.Counter``."""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=np.int64, name='count')
+        self.total = 0
+
+    def update(self, new_counts):
+        """Add a Series of counts indexed by item."""
+        self.total += int(new_counts.sum())
+        self.counts = _merge(self.counts, new_counts)
+        return self
+
+    @property
+    def error(self):
+        """Largest possible underestimate of any count."""
+        return 0.0
+
+    def most_common(self, k=None):
+        """Return the ``k`` largest counts, ties in order of first appearance."""
+        return _most_common(self.counts, k)
+
+    def bounds(self, k=None):
+        """Return the lower and upper bounds of the ``k`` largest counts."""
+        top = self.most_common(k)
+        return pd.DataFrame({'count': top, 'lower': top, 'upper': top + self.error})
+
+
+class HeavyHitters(ExactCounts):
+    """Misra-Gries summary keeping at most ``capacity`` counters."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        super().__init__()
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+
+    def update(self, new_counts):
+        super().update(new_counts)
+        if len(self.counts) > self.capacity:
+            values = self.counts.to_numpy()
+            cut = np.partition(values, len(values) - self.capacity - 1)[len(values) - self.capacity - 1]
+            reduced = self.counts - cut
+            self.counts = reduced[reduced > 0]
+        return self
+
+    @property
+    def error(self):
+        return (self.total - int(self.counts.sum())) / (self.capacity + 1)
+
+
+def stream_counts(path, capacity=DEFAULT_CAPACITY, exact=False,
+                  chunksize=DEFAULT_CHUNKSIZE, method='regex'):
+    """Count tags and channels of the csv ``path`` chunk by chunk.
+
+    Returns the ``(tags, channels)`` summaries; ``tags.most_common(15)`` is
+    the top 15 of the notebook, and ``channels.most_common()`` its
+    ``value_counts()`` of ``channel_title``. Memory is bounded by
+    ``capacity`` counters per summary plus one chunk, unless ``exact`` is set.
+    """
+    if exact:
+        tags, channels = ExactCounts(), ExactCounts()
+    else:
+        tags, channels = HeavyHitters(capacity), HeavyHitters(capacity)
+    for chunk in iter_videos(path, chunksize=chunksize, usecols=['channel_title', 'tags']):
+        tags.update(count_tags(chunk['tags'], method=method, sort=False))
+        channels.update(first_seen_counts(chunk['channel_title']))
+    return tags, channels
@@ -0,0 +1,121 @@
+"""Sparse video x tag incidence matrix.
+
+The tag words of every row are split once (see :mod:`yt_trending.tags`) and
+stored as a CSR matrix with one row per video row, or per ``video_id`` when
+the trending snapshots of a video are merged, and one column per word of the
+tag vocabulary. Questions about tags then become sparse matrix products:
+
+- ``X.T @ X`` gives how many videos share every pair of tags;
+- ``X.T @ views`` gives the views of all the videos using every tag, which is
+  how the tags "that attract more viewers" are found.
+
+Needs scipy.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .tags import split_tags
+
+try:
+    from scipy import sparse
+except ImportError:  # pragma: no cover - optional dependency
+    sparse = None
+
+ENGAGEMENT_COLUMNS = ['views', 'likes', 'comment_count']
+
+
+class TagMatrix:
+    """Incidence matrix of the tag words of a frame.
+
+    ``matrix[i, j]`` is the number of times word ``vocabulary[j]`` appears in
+    the tags of row ``i``. With ``by_video=True`` the rows are the distinct
+    ``video_id``s (in order of first appearance) and a word counts once per
+    video, whatever the number of days the video was trending.
+    """
+
+    def __init__(self, frame, by_video=False, method='regex'):
+        if sparse is None:
+            raise ImportError('the tag incidence matrix needs scipy')
+        self.by_video = by_video
+        tokens = split_tags(frame['tags'], method=method)
+        word_codes, self.vocabulary = pd.factorize(tokens.to_numpy())
+        self.vocabulary = pd.Index(self.vocabulary, name='tag')
+        rows = tokens.index.to_numpy()
+        if by_video:
+            # Matrix row of every frame row.
+            self.row_codes, self.row_labels = pd.factorize(frame['video_id'].to_numpy())
+            self.row_labels = pd.Index(self.row_labels, name='video_id')
+            rows = self.row_codes[rows]
+        else:
+            self.row_codes = np.arange(len(frame))
+            self.row_labels = frame.index
+        shape = (len(self.row_labels), len(self.vocabulary))
+        data = np.ones(len(rows), dtype=np.int32)
+        # Duplicate (row, word) pairs are summed when converting to CSR.
+        self.matrix = sparse.coo_matrix((data, (rows, word_codes)), shape=shape).tocsr()
+        if by_video:
+            self.matrix.data[:] = 1
+        self._binary_matrix = None
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def _binary(self):
+        if self._binary_matrix is None:
+            binary = self.matrix.copy()
+            binary.data = np.ones_like(binary.data)
+            self._binary_matrix = binary
+        return self._binary_matrix
+
+    def tag_counts(self):
+        """Return the number of uses of every word, ordered like :func:`~yt_trending.tags.count_tags`."""
+        counts = np.asarray(self.matrix.sum(axis=0)).ravel()
+        order = np.argsort(-counts, kind='stable')
+        return pd.Series(counts[order], index=self.vocabulary[order], name='count')
+
+    def cooccurrence(self):
+        """Return the sparse tags x tags matrix of the number of rows sharing two words.
+
+        The diagonal holds the number of rows using every word.
+        """
+        binary = self._binary()
+        return (binary.T @ binary).tocsr()
+
+    def cooccurring(self, tag, k=10):
+        """Return the ``k`` words found most often in the same rows as ``tag``."""
+        j = self.vocabulary.get_loc(tag)
+        binary = self._binary()
+        column = binary[:, j]
+        counts = np.asarray((binary.T @ column).todense()).ravel()
+        counts[j] = 0
+        present = np.flatnonzero(counts)
+        order = present[np.argsort(-counts[present], kind='stable')][:k]
+        return pd.Series(counts[order], index=self.vocabulary[order], name='count')
+
+    def _row_values(self, frame, columns):
+        values = frame[columns].to_numpy(dtype=np.float64)
+        if not self.by_video:
+            return values
+        # The counts of a video only grow while it is trending, so its peak
+        # snapshot is the one to keep.
+        peak = pd.DataFrame(values).groupby(self.row_codes).max()
+        return peak.to_numpy()
+
+    def engagement(self, frame, columns=ENGAGEMENT_COLUMNS):
+        """Return the totals of ``columns`` over the rows using every word.
+
+        ``frame`` must be the frame the matrix was built from. The result also
+        holds the number of rows using the word and is sorted by views when
+        they are among ``columns``.
+        """
+        columns = list(columns)
+        binary = self._binary()
+        totals = binary.T @ self._row_values(frame, columns)
+        result = pd.DataFrame(totals, index=self.vocabulary, columns=columns)
+        result.insert(0, 'videos', np.asarray(binary.sum(axis=0)).ravel())
+        if 'views' in columns:
+            result = result.sort_values('views', ascending=False, kind='stable')
+        return result
+
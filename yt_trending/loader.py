@@ -0,0 +1,244 @@
+"""Reading the youtube trending csv dumps with an explicit column schema.
+
+Without a schema, ``pd.read_csv`` stores every count as int64 and every text
+column as a python string column. Here the low-cardinality columns become
+categoricals, the counts are downcast to the smallest unsigned integer that
+holds them, the two date columns are parsed, and unused columns can be pruned
+with ``usecols``.
+
+The free-text columns (``title``, ``tags``, ``description``) hold most of the
+memory as python strings. With ``text='arrow'`` they are kept as Arrow
+strings instead, read by the multithreaded csv reader of pyarrow without
+going through python objects, and with ``text='dictionary'`` as Arrow
+dictionaries, which store every distinct text once: a video trending for ten
+days has the same title, tags and description on its ten rows. The tag
+counting of :mod:`yt_trending.tags` runs on these columns in Arrow kernels.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled, stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pacsv = None
+
+COLUMNS = ['video_id', 'trending_date', 'title', 'channel_title', 'category_id',
+           'publish_time', 'tags', 'views', 'likes', 'dislikes', 'comment_count',
+           'thumbnail_link', 'comments_disabled', 'ratings_disabled',
+           'video_error_or_removed', 'description']
+
+# The columns used by the analyses; everything else is only needed for display.
+ANALYSIS_COLUMNS = ['video_id', 'trending_date', 'title', 'channel_title',
+                    'category_id', 'tags', 'views', 'likes', 'dislikes',
+                    'comment_count']
+
+COUNT_COLUMNS = ['views', 'likes', 'dislikes', 'comment_count']
+CATEGORICAL_COLUMNS = ['channel_title', 'category_id']
+FLAG_COLUMNS = ['comments_disabled', 'ratings_disabled', 'video_error_or_removed']
+TEXT_COLUMNS = ['title', 'tags', 'description']
+# Storage of the text columns: python strings, Arrow strings, Arrow dictionaries.
+TEXT_STORAGES = ('object', 'arrow', 'dictionary')
+
+# trending_date is written as year.day.month, e.g. 17.14.11 for 14 Nov 2017.
+DATE_FORMATS = {
+    'trending_date': '%y.%d.%m',
+    'publish_time': '%Y-%m-%dT%H:%M:%S.%fZ',
+}
+
+# Counts are parsed as uint64 and downcast afterwards: read_csv wraps around
+# silently when a value does not fit a narrower integer dtype.
+READ_DTYPES = {
+    'channel_title': 'category',
+    'category_id': 'uint16',
+    **{column: 'uint64' for column in COUNT_COLUMNS},
+    **{column: 'bool' for column in FLAG_COLUMNS},
+}
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# The default na_values of read_csv, so that the Arrow reader finds the same missing values.
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+             '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def _resolve_usecols(usecols):
+    if usecols is None:
+        return None
+    unknown = set(usecols) - set(COLUMNS)
+    if unknown:
+        raise ValueError('unknown columns: %s' % ', '.join(sorted(unknown)))
+    return [column for column in COLUMNS if column in usecols]
+
+
+def _read_dtypes(usecols):
+    if usecols is None:
+        return dict(READ_DTYPES)
+    return {column: dtype for column, dtype in READ_DTYPES.items() if column in usecols}
+
+
+def downcast_counts(values):
+    """Return ``values`` as uint32 when it fits, uint64 otherwise.
+
+    The choice is deliberately coarse so that chunks of the same file end up
+    with the same dtype in practice.
+    """
+    if len(values) and values.max() > np.iinfo(np.uint32).max:
+        return values.astype(np.uint64)
+    return values.astype(np.uint32)
+
+
+def _check_text(text):
+    if text is not None and text not in TEXT_STORAGES:
+        raise ValueError('text must be one of %s, not %r' % (TEXT_STORAGES, text))
+    if text in ('arrow', 'dictionary') and pa is None:
+        raise ImportError('the Arrow text storage needs pyarrow')
+
+
+def text_series(values, text, index=None, name=None):
+    """Return a text column (a Series or an Arrow array) stored as ``text``."""
+    if text == 'object':
+        if not isinstance(values, pd.Series):
+            values = pd.Series(values.to_pandas(), index=index, name=name)
+        return values.astype(object)
+    if isinstance(values, pd.Series):
+        index, name = values.index, values.name
+        array = pa.array(values, from_pandas=True)
+    else:
+        array = values
+    if pa.types.is_dictionary(array.type) and text == 'arrow':
+        array = array.cast(array.type.value_type)
+    elif not pa.types.is_dictionary(array.type) and text == 'dictionary':
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        array = array.dictionary_encode()
+    return pd.Series(pd.arrays.ArrowExtensionArray(array), index=index, name=name)
+
+
+def apply_text_storage(frame, text):
+    """Convert the text columns of ``frame`` to the storage ``text``, in place."""
+    _check_text(text)
+    if text is not None:
+        for column in TEXT_COLUMNS:
+            if column in frame:
+                frame[column] = text_series(frame[column], text)
+    return frame
+
+
+def _read_arrow(path, usecols, text):
+    """Read the csv with pyarrow, the text columns staying in Arrow memory."""
+    columns = usecols or COLUMNS
+    types = {column: pa.string() for column in columns}
+    types.update({column: pa.uint64() for column in COUNT_COLUMNS})
+    types.update({column: pa.bool_() for column in FLAG_COLUMNS})
+    types['category_id'] = pa.uint16()
+    options = pacsv.ConvertOptions(include_columns=columns, column_types=types,
+                                   null_values=NA_VALUES, strings_can_be_null=True)
+    table = pacsv.read_csv(path, convert_options=options)
+    text_columns = [column for column in columns if column in TEXT_COLUMNS]
+    frame = table.drop(text_columns).to_pandas()
+    for column in text_columns:
+        frame[column] = text_series(table[column], text, index=frame.index, name=column)
+    if 'channel_title' in frame:
+        # Its categories are sorted by apply_schema, as for read_csv.
+        frame['channel_title'] = frame['channel_title'].astype('category')
+    return frame[columns]
+
+
+def sort_categories(frame):
+    """Sort the categories of the categorical columns of ``frame``, in place.
+
+    Whatever the reader, the codes then rank like the labels.
+    """
+    for column in CATEGORICAL_COLUMNS:
+        if column in frame and not frame[column].cat.categories.is_monotonic_increasing:
+            frame[column] = frame[column].cat.reorder_categories(frame[column].cat.categories.sort_values())
+    return frame
+
+
+@profiled()
+def apply_schema(frame):
+    """Convert the columns of a freshly read frame to their schema dtypes, in place."""
+    for column in COUNT_COLUMNS:
+        if column in frame:
+            frame[column] = downcast_counts(frame[column])
+    if 'category_id' in frame:
+        frame['category_id'] = frame['category_id'].astype('category')
+    sort_categories(frame)
+    for column, date_format in DATE_FORMATS.items():
+        if column in frame:
+            frame[column] = pd.to_datetime(frame[column], format=date_format, utc=column == 'publish_time')
+    return frame
+
+
+def iter_videos(path, chunksize=DEFAULT_CHUNKSIZE, usecols=None, text=None):
+    """Yield the typed csv in frames of at most ``chunksize`` rows.
+
+    Categories are inferred per chunk, so concatenating the chunks turns
+    ``channel_title`` back into plain strings unless the categories are unioned.
+    """
+    _check_text(text)
+    usecols = _resolve_usecols(usecols)
+    reader = pd.read_csv(path, usecols=usecols, dtype=_read_dtypes(usecols),
+                         chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield apply_text_storage(apply_schema(chunk), text)
+
+
+@profiled()
+def load_videos(path, usecols=None, chunksize=None, text=None):
+    """Load a trending-videos csv with the explicit schema.
+
+    With ``chunksize`` set, an iterator of typed chunks is returned instead of
+    a single frame (see :func:`iter_videos`). ``text`` is the storage of the
+    text columns, one of :data:`TEXT_STORAGES`; by default they are what
+    ``read_csv`` makes of them.
+    """
+    _check_text(text)
+    if chunksize is not None:
+        return iter_videos(path, chunksize=chunksize, usecols=usecols, text=text)
+    usecols = _resolve_usecols(usecols)
+    if text in ('arrow', 'dictionary'):
+        with stage('read_arrow') as record:
+            frame = record.output(_read_arrow(path, usecols, text))
+        return apply_schema(frame)
+    with stage('read_csv') as record:
+        frame = record.output(pd.read_csv(path, usecols=usecols, dtype=_read_dtypes(usecols)))
+    return apply_text_storage(apply_schema(frame), text)
+
+
+def memory_report(path, usecols=None, text=None):
+    """Compare the memory of the default ``read_csv`` frame with the typed one.
+
+    Returns a frame with the deep memory usage in bytes of every column under
+    both loaders, and a ``total`` row. The baseline is what ``data.info()``
+    reports for ``pd.read_csv(path)``; ``text`` is the storage of the text
+    columns of the typed frame.
+    """
+    baseline = pd.read_csv(path).memory_usage(deep=True, index=False)
+    typed = load_videos(path, usecols=usecols, text=text).memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'baseline': baseline, 'typed': typed})
+    report.loc['total'] = report.sum()
+    report['saved'] = report['baseline'] - report['typed'].fillna(0)
+    report['saved %'] = report['saved'] / report['baseline'] * 100
+    return report
+
+
+def text_memory_report(path, storages=TEXT_STORAGES):
+    """Compare the memory of the text columns under every storage of :data:`TEXT_STORAGES`.
+
+    Returns the deep memory usage in bytes of every text column, and a
+    ``total`` row, with the saving of every storage against python strings.
+    """
+    usage = {text: load_videos(path, usecols=TEXT_COLUMNS, text=text).memory_usage(deep=True, index=False)
+             for text in storages}
+    report = pd.DataFrame(usage)
+    report.loc['total'] = report.sum()
+    for text in storages:
+        if text != 'object' and 'object' in storages:
+            report['%s saved %%' % text] = (1 - report[text] / report['object']) * 100
+    return report
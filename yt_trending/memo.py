@@ -0,0 +1,292 @@
+"""Memoized derived results, keyed by the content of the columns they read.
+
+The notebook computes the same derived results several times: the number of
+videos of every channel alone is computed with ``channel_group['title'].count()``,
+``data['channel_title'].value_counts()`` and a ``groupby().apply``.
+:class:`ResultCache` computes a result once and returns it again as long as
+the columns it was computed from did not change::
+
+    results = ResultCache(max_bytes='256MB')
+    counts = results(channel_counts, data, columns=['channel_title'])
+    table = results(channel_stats, data, columns=['channel_title', 'comment_count'],
+                    thresholds=(1000,))
+
+A result is keyed by the name of the function, a digest of every column it
+reads and its parameters. Changing one of those columns of the frame (or
+passing another frame with different values) gives another key; the results
+computed from the previous values of the column by that frame are dropped
+as soon as the change is seen, unless another frame still has those values.
+Changing other columns keeps them.
+
+A column is hashed once per frame: the cache keeps the column it hashed and
+the addresses of its buffers, and hashes it again only when they changed.
+Since the cache holds a reference to the column, pandas copies the data
+before writing to it (copy-on-write), so that changes made in place are
+seen too. Copy-on-write is always on from pandas 3 only: with older versions
+columns are hashed on every lookup unless ``pd.options.mode.copy_on_write``
+is true. Columns whose buffers cannot be read cheaply, such as time zone
+aware datetimes, are hashed on every lookup as well. Frames are tracked through weak
+references and forgotten when they are garbage collected.
+
+When ``version`` is given, for instance the content hash of the csv the
+frame was loaded from, columns are keyed by that version instead of being
+hashed, which saves a pass over them; the caller is then responsible for
+passing a new version when the data changes.
+
+Results are kept in memory up to ``max_bytes``, the least recently used
+ones being evicted first. With ``spill_dir``, evicted results are pickled
+to that directory and read back instead of being computed again; since the
+files are keyed by the content of the columns, they stay valid across runs.
+
+The cached results are returned as they are, not copied: they must not be
+modified in place.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+
+def column_digest(values):
+    """Return a hash of the dtype and the values of a column, ignoring its index."""
+    digest = hashlib.sha1(str(values.dtype).encode())
+    digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _buffers(values):
+    """Return the addresses of the buffers of a column, or None when they are not at hand."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = _buffers(values.cat.codes)
+        return codes + (id(values.cat.categories),)
+    if isinstance(values.dtype, np.dtype):
+        array = values.to_numpy()
+        return array.__array_interface__['data'][0], array.shape, array.strides
+    if isinstance(values.array, pd.arrays.ArrowExtensionArray):
+        chunks = values.array.__arrow_array__().chunks
+        arrays = chunks + [chunk.dictionary for chunk in chunks if hasattr(chunk, 'dictionary')]
+        return tuple((array.offset, len(array)) + tuple(buffer.address for buffer in array.buffers()
+                                                       if buffer is not None) for array in arrays)
+    return None
+
+
+def _copy_on_write():
+    """Whether pandas copies data shared with other objects before writing to it."""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
+
+def result_size(value):
+    """Return an estimate of the memory of a result, in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray) or hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(result_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Return a hashable equivalent of a parameter value."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, np.ndarray):
+        return tuple(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ResultCache:
+    """Least recently used results of functions of a frame, under a memory cap."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=None):
+        if isinstance(max_bytes, str):
+            from .outofcore import parse_size
+            max_bytes = parse_size(max_bytes)
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.nbytes = 0
+        self.hits = self.misses = self.spilled = 0
+        # key -> (result, size), least recently used first.
+        self._entries = OrderedDict()
+        # id of the frame -> (weak reference to it, {column: (values, buffers, digest)}).
+        self._frames = {}
+        # (column, digest) -> keys of the results computed from it.
+        self._dependents = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _columns(self, frame):
+        """Return the columns hashed for ``frame``, forgotten when it is collected."""
+        key = id(frame)
+        entry = self._frames.get(key)
+        if entry is None or entry[0]() is not frame:
+            frames = self._frames
+            reference = weakref.ref(frame, lambda _, key=key: frames.pop(key, None))
+            entry = self._frames[key] = (reference, {})
+        return entry[1]
+
+    def _digest(self, frame, column):
+        seen = self._columns(frame)
+        values = frame[column]
+        buffers = _buffers(values)
+        previous = seen.get(column)
+        unchanged = previous is not None and buffers is not None and previous[1] == buffers
+        if unchanged and _copy_on_write():
+            return previous[2]
+        digest = column_digest(values)
+        # The column is kept so that its buffers are not reused by other data.
+        seen[column] = (values, buffers, digest)
+        if previous is not None and previous[2] != digest and not self._in_use(column, previous[2]):
+            # The column was changed in place or replaced.
+            self._drop_dependents((column, previous[2]))
+        return digest
+
+    def _in_use(self, column, digest):
+        # Whether another frame still has these values in ``column``.
+        return any(columns.get(column, (None, None, None))[2] == digest
+                   for _, columns in self._frames.values())
+
+    def _tokens(self, frame, columns, version):
+        if version is not None:
+            return tuple((column, 'version:%s' % version) for column in columns)
+        return tuple((column, self._digest(frame, column)) for column in columns)
+
+    def key(self, function, frame, columns, version=None, **params):
+        """Return the key of ``function(frame, **params)``."""
+        if isinstance(function, str):
+            name = function
+        else:
+            name = '%s.%s' % (function.__module__, function.__qualname__)
+            if '<' in name:
+                # Lambdas and local functions share their qualified name.
+                name += '@%x' % id(function)
+        return name, self._tokens(frame, columns, version), _freeze(params)
+
+    def __call__(self, function, frame, columns, version=None, **params):
+        """Return ``function(frame, **params)``, computed at most once per content of ``columns``."""
+        key = self.key(function, frame, columns, version, **params)
+        found, result = self.lookup(key)
+        if not found:
+            result = function(frame, **params)
+            self.store(key, result)
+        return result
+
+    def lookup(self, key):
+        """Return ``(True, result)`` for a key held in memory or spilled, ``(False, None)`` otherwise.
+
+        A key that is not found counts as a miss.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key][0]
+        found, result = self._read_spilled(key)
+        if found:
+            self.hits += 1
+            self._insert(key, result)
+        else:
+            self.misses += 1
+        return found, result
+
+    def store(self, key, result):
+        """Keep ``result`` under ``key``, computed by the caller."""
+        if key not in self._entries:
+            self._insert(key, result)
+
+    def _insert(self, key, result):
+        size = result_size(result)
+        if size > self.max_bytes:
+            self._spill(key, result)
+            return
+        self._entries[key] = (result, size)
+        self.nbytes += size
+        for token in key[1]:
+            self._dependents.setdefault(token, set()).add(key)
+        while self.nbytes > self.max_bytes:
+            old_key, (old_result, _) = next(iter(self._entries.items()))
+            self._remove(old_key)
+            self._spill(old_key, old_result)
+
+    def _remove(self, key):
+        _, size = self._entries.pop(key)
+        self.nbytes -= size
+        for token in key[1]:
+            keys = self._dependents.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[token]
+
+    def _drop_dependents(self, token):
+        for key in list(self._dependents.get(token, ())):
+            self._remove(key)
+            path = self._spill_path(key)
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    def _spill_path(self, key):
+        if self.spill_dir is None:
+            return None
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.spill_dir, name + '.pkl')
+
+    def _spill(self, key, result):
+        path = self._spill_path(key)
+        if path is None or os.path.exists(path):
+            return
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as handle:
+            pickle.dump(result, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.spilled += 1
+
+    def _read_spilled(self, key):
+        path = self._spill_path(key)
+        if path is None or not os.path.exists(path):
+            return False, None
+        with open(path, 'rb') as handle:
+            return True, pickle.load(handle)
+
+    def invalidate(self, column=None):
+        """Drop the results computed from ``column``, or all the results."""
+        for key in list(self._entries):
+            if column is None or any(name == column for name, _ in key[1]):
+                self._remove(key)
+        if column is None:
+            self._frames.clear()
+
+    def clear(self, spilled=False):
+        """Drop every result held in memory, and the spilled ones with ``spilled``."""
+        self.invalidate()
+        if spilled and self.spill_dir is not None:
+            for name in os.listdir(self.spill_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.spill_dir, name))
+
+    def stats(self):
+        """Return the number of results, their memory and the hit/miss counters."""
+        return {'results': len(self._entries), 'bytes': self.nbytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'spilled': self.spilled}
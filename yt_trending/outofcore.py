@@ -0,0 +1,101 @@
+"""Running the analyses on datasets that do not fit in memory.
+
+The notebook keeps the whole frame in memory, adds the VCP column to it and
+builds full sorted copies with ``sort_values``. Here the data is read in
+chunks sized from a memory budget, either from the memory-mapped Feather cache
+(see :mod:`yt_trending.cache`) when it is up to date, or from the csv
+otherwise, and every chunk is folded into an
+:class:`~yt_trending.store.AggregateStore`: VCP moments, top-k rows by
+comment_count and likes, tag counts and channel statistics. Only one chunk
+and the aggregates are in memory at a time, and the results are those of the
+in-memory functions on the full frame.
+
+The budget sizes the chunks: it bounds the memory of one chunk and of its
+temporaries only. The aggregates come on top of it, and grow with the number
+of channels and distinct tags, and so do the buffers of the csv reader. The
+pages of the Feather file are read by the operating system as the chunks
+touch them and can be dropped again; they are not counted either.
+
+The VCP of every row can also be written to a raw float64 file and read back
+as a ``np.memmap`` instead of being added as a column.
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from . import cache
+from .loader import iter_videos
+from .analysis import vcp
+from .store import STORE_COLUMNS, AggregateStore
+
+DEFAULT_BUDGET = 512 * 2 ** 20
+# Rows of the csv sampled to estimate the memory of a row.
+SAMPLE_ROWS = 1000
+# Room left for the temporaries of tokenization, sorting and groupby.
+OVERHEAD = 4
+
+_UNITS = {'': 1, 'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30}
+
+
+def parse_size(size):
+    """Return a size in bytes, from a number or a string like ``'512MB'``."""
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?)I?B?\s*', size.upper())
+    if match is None:
+        raise ValueError('invalid size %r' % size)
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def rows_per_chunk(path, memory_budget=DEFAULT_BUDGET, columns=STORE_COLUMNS):
+    """Return how many rows of ``columns`` fit in ``memory_budget``, temporaries included."""
+    chunks = iter_videos(path, chunksize=SAMPLE_ROWS, usecols=columns)
+    sample = next(chunks, pd.DataFrame())
+    chunks.close()
+    row_bytes = max(sample.memory_usage(deep=True, index=False).sum() / max(len(sample), 1), 1)
+    return max(1, int(parse_size(memory_budget) // (row_bytes * OVERHEAD)))
+
+
+def iter_chunks(path, rows, columns=STORE_COLUMNS):
+    """Yield the typed dataset in frames of ``rows`` rows.
+
+    Chunks are slices of the memory-mapped Feather cache when it is fresh,
+    so only the pages of the requested columns are read, one chunk at a time,
+    and chunks of the csv otherwise.
+    """
+    if cache.feather is not None and cache.is_fresh(path):
+        table = cache.map_table(path, [column for column in cache.COLUMNS if column in columns])
+        for offset in range(0, table.num_rows, rows):
+            yield table.slice(offset, rows).to_pandas()
+    else:
+        yield from iter_videos(path, chunksize=rows, usecols=columns)
+
+
+def analyse(path, memory_budget=DEFAULT_BUDGET, k=50, thresholds=(1000,), method='regex'):
+    """Run the VCP, top-k, tag and channel analyses on ``path``, in chunks of ``memory_budget``.
+
+    Returns the :class:`~yt_trending.store.AggregateStore` holding the results.
+    """
+    rows = rows_per_chunk(path, memory_budget)
+    store = AggregateStore(thresholds=thresholds, k=k, method=method)
+    return store.ingest_chunks(iter_chunks(path, rows))
+
+
+def write_vcp(path, output, memory_budget=DEFAULT_BUDGET):
+    """Write the VCP of every row of ``path`` to ``output`` and memory-map it.
+
+    The file holds raw float64 values, one per row in file order.
+    """
+    columns = ['views', 'comment_count']
+    rows = rows_per_chunk(path, memory_budget, columns)
+    tmp_path = output + '.tmp'
+    with open(tmp_path, 'wb') as handle:
+        for chunk in iter_chunks(path, rows, columns):
+            vcp(chunk).to_numpy(dtype=np.float64).tofile(handle)
+    os.replace(tmp_path, output)
+    if not os.path.getsize(output):
+        return np.empty(0, dtype=np.float64)
+    return np.memmap(output, dtype=np.float64, mode='r')
@@ -0,0 +1,98 @@
+"""The charts of the notebook, drawn from small result tables.
+
+matplotlib is only imported when a chart is drawn, so that the numeric
+analyses start without it. When a chart is saved to a file the Agg backend
+is used, which needs no display.
+"""
+
+CHANNEL_FREQUENCY_LABEL = 'Number of videos published by the channel in 50 most hits'
+
+
+def _pyplot(headless):
+    import matplotlib
+    if headless:
+        matplotlib.use('Agg')
+    from matplotlib import pyplot as plt
+    return plt
+
+
+def _finish(plt, figure, path):
+    if path is None:
+        plt.show()
+    else:
+        figure.savefig(path, bbox_inches='tight')
+        plt.close(figure)
+
+
+def plot_channel_frequency(frequency, path=None, xlabel=CHANNEL_FREQUENCY_LABEL):
+    """Horizontal bars of the number of popular videos of every channel.
+
+    ``frequency`` is a Series of counts indexed by channel name, such as
+    ``most_popular_videos['channel_title'].value_counts()``.
+    """
+    plt = _pyplot(path is not None)
+    figure, ax = plt.subplots()
+    ax.barh(frequency.index.astype(str), frequency.to_numpy())
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Name of top youtube channels')
+    _finish(plt, figure, path)
+
+
+def plot_likes_views(videos, path=None):
+    """Scatter plot of likes against views, coloured by VCP, with the diagonal line.
+
+    ``videos`` holds the ``likes``, ``views`` and ``VCP`` columns of a few
+    videos, such as the result of :func:`yt_trending.analysis.top_videos`.
+    """
+    plt = _pyplot(path is not None)
+    figure, ax = plt.subplots()
+    points = ax.scatter(videos['likes'], videos['views'], edgecolor='black', c=videos['VCP'],
+                        cmap='summer', linewidth=1, alpha=0.75)
+    colorbar = figure.colorbar(points)
+    colorbar.set_label('commet counts/views ratio')
+    xlims = ax.get_xlim()
+    ylims = ax.get_ylim()
+    ax.plot(xlims, ylims, ls='--')
+    _finish(plt, figure, path)
+
+
+def plot_tag_counts(counts, path=None):
+    """Horizontal bars of the most common tagging words, the most common on top."""
+    plt = _pyplot(path is not None)
+    with plt.style.context('fivethirtyeight'):
+        figure, ax = plt.subplots()
+        ax.barh(counts.index[::-1].astype(str), counts.to_numpy()[::-1], color='blue')
+        ax.set_xlabel('Frequency of the tagging words')
+        ax.set_ylabel('Names of the %d most common tagging words' % len(counts))
+        ax.set_title('Analysing the popularity of tagging words')
+        _finish(plt, figure, path)
+
+
+def plot_likes_views_density(grid, overlay=None, path=None):
+    """Likes x views cells of a :class:`~yt_trending.density.DensityGrid`, coloured by mean VCP.
+
+    ``overlay`` holds a few videos to scatter on top, such as the twenty most
+    liked ones, and the diagonal line of the notebook is drawn as well.
+    """
+    import numpy as np
+    plt = _pyplot(path is not None)
+    figure, ax = plt.subplots()
+    means = grid.mean_vcp
+    # A few cells with a single odd video would otherwise set the colour scale.
+    vmax = np.nanpercentile(means, 99) if np.isfinite(means).any() else None
+    mesh = ax.pcolormesh(10 ** grid.x_edges - 1, 10 ** grid.y_edges - 1,
+                         np.ma.masked_invalid(means).T, cmap='summer', shading='flat',
+                         vmin=0, vmax=vmax)
+    colorbar = figure.colorbar(mesh)
+    colorbar.set_label('commet counts/views ratio')
+    ax.set_xscale('symlog', linthresh=1)
+    ax.set_yscale('symlog', linthresh=1)
+    if overlay is not None:
+        ax.scatter(overlay['likes'], overlay['views'], edgecolor='black', c=overlay['VCP'],
+                   cmap='summer', norm=mesh.norm, linewidth=1, alpha=0.75)
+    xlims = ax.get_xlim()
+    ylims = ax.get_ylim()
+    ax.plot(xlims, ylims, ls='--')
+    ax.set_xlabel('number of likes')
+    ax.set_ylabel('number of views')
+    _finish(plt, figure, path)
@@ -0,0 +1,259 @@
+"""Optional timing and memory records of the analysis stages.
+
+Every stage of the package (loading, ranking, VCP, tag counting, channel
+statistics) is wrapped with :func:`profiled` or :func:`stage`. Nothing is
+recorded until :func:`enable` is called: the wrappers then only check a
+module global and call through. Once enabled, every stage run appends a
+record with
+
+- the wall and CPU time of the stage,
+- the peak resident memory of the process during the stage, where Linux lets
+  the peak be reset (``/proc/self/clear_refs``), the peak since the start of
+  the process otherwise,
+- the number of rows of its input and output frames, and their
+  ``memory_usage(deep=True)``.
+
+Stages run inside other stages are recorded too, with the name of their
+parent. :func:`disable` returns the records and writes them as json, and the
+whole session can also be profiled with cProfile (a ``.prof`` file, for
+``snakeviz`` or ``pstats``) or pyinstrument (a ``.html`` file), e.g.::
+
+    profiling.enable(json_path='stages.json', profile_path='run.prof')
+    counts = count_tags(load_cached('FRvideos.csv')['tags'])
+    profiling.disable()
+
+Measuring the deep memory of frames with string columns takes time of its
+own, so it can be turned off with ``enable(memory=False)``.
+
+Resetting the peak memory at the start of every stage is process wide:
+while profiling is enabled, ``VmHWM`` of ``/proc/self/status`` (and whatever
+other tool reads it) no longer holds the peak since the start of the
+process. The ``peak_rss`` of the json file is the largest of the peak when
+profiling was enabled, the peaks of the stages and the one at the end.
+"""
+
+import functools
+import json
+import os
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on windows
+    resource = None
+
+_session = None
+
+
+class _Session:
+
+    def __init__(self, json_path, profile_path, memory):
+        self.json_path = json_path
+        self.profile_path = profile_path
+        self.memory = memory
+        self.records = []
+        self.stack = []
+        # Lost at the first reset of the peak.
+        self.peak_rss = _read_hwm()
+        self.profiler = None
+        if profile_path is not None:
+            self.profiler = _start_profiler(profile_path)
+
+
+class _Record(dict):
+    """The record of one stage run; :meth:`output` gives the result it measures."""
+
+    result = None
+
+    def output(self, result):
+        # Measured when the stage ends, outside of its timings.
+        if self is not _IGNORED:
+            self.result = result
+        return result
+
+
+# Returned by stage() when nothing is recorded.
+_IGNORED = _Record()
+
+
+def _start_profiler(path):
+    # The profilers are only imported when asked for; pyinstrument is optional.
+    if path.endswith('.html'):
+        try:
+            import pyinstrument
+        except ImportError:
+            raise ImportError('pyinstrument is needed to write %s' % path) from None
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler, path):
+    if path.endswith('.html'):
+        profiler.stop()
+        with open(path, 'w') as handle:
+            handle.write(profiler.output_html())
+    else:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def _read_hwm():
+    """Return the peak resident memory of the process in bytes, None if unknown."""
+    try:
+        with open('/proc/self/status') as handle:
+            for line in handle:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def _reset_hwm():
+    """Reset the peak resident memory to the current one, where the kernel allows it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as handle:
+            handle.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _frame_stats(prefix, value, memory):
+    stats = {}
+    if hasattr(value, 'shape') and hasattr(value, 'memory_usage'):
+        stats['rows_' + prefix] = int(value.shape[0])
+        if memory:
+            usage = value.memory_usage(deep=True)
+            stats['memory_' + prefix] = int(getattr(usage, 'sum', lambda: usage)())
+    return stats
+
+
+def _carry_peak(record, peak):
+    record['child_peak_rss'] = max(record.get('child_peak_rss', 0), peak or 0)
+
+
+def enable(json_path=None, profile_path=None, memory=True):
+    """Start recording the stages, and profiling when ``profile_path`` is given."""
+    global _session
+    if _session is not None:
+        raise RuntimeError('profiling is already enabled')
+    _session = _Session(json_path, profile_path, memory)
+
+
+def disable():
+    """Stop recording and return the records, also written to the json path if any."""
+    global _session
+    session, _session = _session, None
+    if session is None:
+        return []
+    if session.profiler is not None:
+        _stop_profiler(session.profiler, session.profile_path)
+    if session.json_path is not None:
+        write_json(session.records, session.json_path, session.peak_rss)
+    return session.records
+
+
+def is_enabled():
+    return _session is not None
+
+
+def write_json(records, path, peak_rss=None):
+    """Write the records of a session to ``path``, with the peak memory of the process.
+
+    The stages reset the peak of the process, so it is the largest of the
+    current peak, the peaks of the ``records`` and ``peak_rss``, the peak
+    before the session.
+    """
+    peaks = [_read_hwm(), peak_rss] + [record.get('peak_rss') for record in records]
+    peak = max((value for value in peaks if value is not None), default=None)
+    with open(path, 'w') as handle:
+        json.dump({'peak_rss': peak, 'stages': records}, handle, indent=1)
+
+
+def summary(records):
+    """Return the records as a frame, one row per stage run, in order of completion."""
+    import pandas as pd
+    return pd.DataFrame(records)
+
+
+class stage:
+    """Context manager recording the block it wraps as the stage ``name``.
+
+    ``frame`` is the input of the stage; the output is given with
+    ``record.output(result)``::
+
+        with stage('read_csv') as record:
+            frame = record.output(pd.read_csv(path))
+    """
+
+    __slots__ = ('name', 'frame', 'record', 'start')
+
+    def __init__(self, name, frame=None):
+        self.name = name
+        self.frame = frame
+        self.record = None
+
+    def __enter__(self):
+        session = _session
+        if session is None:
+            return _IGNORED
+        record = _Record(stage=self.name, parent=session.stack[-1]['stage'] if session.stack else None)
+        record.update(_frame_stats('in', self.frame, session.memory))
+        self.frame = None
+        if session.stack:
+            # Keep the peak of the parent so far, this stage resets it.
+            _carry_peak(session.stack[-1], _read_hwm())
+        session.stack.append(record)
+        self.record = record
+        record['rss_reset'] = _reset_hwm()
+        self.start = time.perf_counter(), time.process_time()
+        return record
+
+    def __exit__(self, *exc_info):
+        record = self.record
+        if record is None:
+            return False
+        wall, cpu = time.perf_counter() - self.start[0], time.process_time() - self.start[1]
+        record['wall_seconds'] = wall
+        record['cpu_seconds'] = cpu
+        peak = max(_read_hwm() or 0, record.pop('child_peak_rss', 0))
+        record['peak_rss'] = peak or None
+        record['failed'] = exc_info[0] is not None
+        session = _session
+        if session is not None:
+            record.update(_frame_stats('out', record.result, session.memory))
+            record.result = None
+            session.stack.pop()
+            if session.stack:
+                _carry_peak(session.stack[-1], peak)
+            session.records.append(record)
+        return False
+
+
+def profiled(name=None):
+    """Decorator recording every call of the function as a stage.
+
+    The first argument is taken as the input frame and the return value as
+    the output; when profiling is off, the function is called directly.
+    """
+    def decorate(function):
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _session is None:
+                return function(*args, **kwargs)
+            with stage(stage_name, args[0] if args else None) as record:
+                return record.output(function(*args, **kwargs))
+        return wrapper
+    return decorate
@@ -0,0 +1,146 @@
+"""Ranked views of the frame for top-k and rank-window queries.
+
+``data.sort_values(...)`` and ``data.nlargest(...)`` sort the whole frame every
+time they are called. :class:`RankedIndex` sorts the key columns once, with
+``np.lexsort`` on the raw arrays, and keeps only the resulting row order. After
+that ``top(k)`` and ``window(start, stop)`` are slices of that order and cost
+O(k). Rows appended later are merged into the existing order instead of
+sorting everything again.
+
+Ties are broken by row position, like ``nlargest(keep='first')`` and a stable
+``sort_values``; missing values are ranked last.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _as_list(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _sort_key(values, ascending):
+    """Map ``values`` to an array whose ascending order is the requested one.
+
+    The mapping does not depend on the values themselves, so keys computed for
+    appended rows stay comparable with the keys already in the index.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        values = values.view(np.int64)
+    if values.dtype.kind not in 'biuf':
+        raise ValueError('only numeric and date columns can be ranked, not %s values' % values.dtype)
+    if values.dtype.kind == 'f':
+        key = values if ascending else -values
+        return np.where(np.isnan(key), np.inf, key)
+    if ascending:
+        return values
+    if values.dtype.kind == 'u':
+        return np.iinfo(values.dtype).max - values
+    # Bitwise not is x -> -x - 1: decreasing and without overflow.
+    return ~values
+
+
+def top_positions(values, k, ascending=False):
+    """Return the positions of the ``k`` largest (or smallest) ``values``, ranked.
+
+    This is a one-off ``nlargest``/``nsmallest`` on a single array: it selects
+    with ``np.partition`` and only sorts the ``k`` selected values.
+    """
+    key = _sort_key(values, ascending)
+    k = min(k, len(key))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = np.partition(key, k - 1)[k - 1]
+    before = np.flatnonzero(key < kth)
+    ties = np.flatnonzero(key == kth)[:k - len(before)]
+    selected = np.sort(np.concatenate([before, ties]))
+    return selected[np.argsort(key[selected], kind='stable')]
+
+
+class RankedIndex:
+    """Row order of ``frame`` sorted by the columns ``by``.
+
+    ``ascending`` is a bool or a list with one bool per column, as for
+    ``DataFrame.sort_values``; the default ranks the largest values first.
+    """
+
+    def __init__(self, frame, by, ascending=False):
+        self.by = _as_list(by)
+        ascending = _as_list(ascending)
+        if len(ascending) == 1:
+            ascending = ascending * len(self.by)
+        if len(ascending) != len(self.by):
+            raise ValueError('ascending must have one value per sort column')
+        self.ascending = ascending
+        self.frame = frame
+        keys = self._make_keys(frame, start=0)
+        self._keys = keys[self._lexsort(keys)]
+
+    def _make_keys(self, frame, start):
+        fields = [_sort_key(frame[column].to_numpy(), asc)
+                  for column, asc in zip(self.by, self.ascending)]
+        dtype = [('k%d' % i, field.dtype) for i, field in enumerate(fields)]
+        keys = np.empty(len(frame), dtype=dtype + [('pos', np.int64)])
+        for i, field in enumerate(fields):
+            keys['k%d' % i] = field
+        keys['pos'] = np.arange(start, start + len(frame))
+        return keys
+
+    def _lexsort(self, keys):
+        # The positions are increasing, so a stable lexsort on the key fields
+        # breaks ties by position. Sorting the structured array itself gives
+        # the same order but compares records field by field, several times
+        # slower.
+        return np.lexsort([keys['k%d' % i] for i in reversed(range(len(self.by)))])
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def nbytes(self):
+        """Memory of the sorted keys, the frame not included."""
+        return self._keys.nbytes
+
+    @property
+    def order(self):
+        """Row positions of the frame, in rank order."""
+        return self._keys['pos']
+
+    def positions(self, start=0, stop=None):
+        """Return the row positions ranked ``start`` to ``stop`` (exclusive)."""
+        return self.order[start:stop]
+
+    def window(self, start, stop):
+        """Return the rows ranked ``start`` to ``stop``, like ``sorted_data.iloc[start:stop]``."""
+        return self.frame.iloc[self.positions(start, stop)]
+
+    def top(self, k):
+        """Return the ``k`` first ranked rows."""
+        return self.window(0, k)
+
+    def rank_of(self, positions):
+        """Return the rank of the rows at the given positions (0 is first)."""
+        ranks = np.empty(len(self._keys), dtype=np.int64)
+        ranks[self.order] = np.arange(len(self._keys))
+        return ranks[np.asarray(positions)]
+
+    def append(self, rows):
+        """Append ``rows`` to the frame and merge them into the ranking.
+
+        Only the new rows are sorted; they are then inserted into the existing
+        order with a binary search. The index keeps the concatenated frame,
+        and new rows get positions after the existing ones.
+        """
+        if not len(rows):
+            return self
+        new_keys = self._make_keys(rows, start=len(self._keys))
+        new_keys = new_keys[self._lexsort(new_keys)]
+        # A structured array compares field by field, and the positions make
+        # every key unique, so side does not matter.
+        where = np.searchsorted(self._keys, new_keys)
+        self._keys = np.insert(self._keys, where, new_keys)
+        self.frame = pd.concat([self.frame, rows])
+        return self
@@ -0,0 +1,99 @@
+"""Rendering all the charts of the notebook to files, in parallel.
+
+The data frame is only used to compute the small tables the charts are drawn
+from (the channels of the 50 most commented videos, the top and third twenty
+videos by likes, and the 15 most common tags of both counting approaches).
+Every chart is then rendered with the Agg backend in a worker process, which
+only receives its table. A ``manifest.json`` in the output directory records a
+hash of the table each file was drawn from, and charts whose table did not
+change since the last run are not rendered again.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .analysis import top_videos
+from .tags import count_tags
+
+MANIFEST = 'manifest.json'
+
+# Chart name -> plotting function of yt_trending.plots.
+FIGURES = {
+    'channel_frequency': 'plot_channel_frequency',
+    'most_popular_videos': 'plot_likes_views',
+    'third_twenty_popular_videos': 'plot_likes_views',
+    'tags_first_approach': 'plot_tag_counts',
+    'tags_second_approach': 'plot_tag_counts',
+}
+
+
+def report_tables(data):
+    """Return the table every chart of :data:`FIGURES` is drawn from."""
+    popular = top_videos(data, 50, by='comment_count', columns=['channel_title'])
+    frequency = popular['channel_title'].astype(object).value_counts()
+    columns = ['title', 'likes', 'views']
+    return {
+        'channel_frequency': frequency,
+        'most_popular_videos': top_videos(data, 20, by='likes', columns=columns),
+        'third_twenty_popular_videos': top_videos(data, 20, by='likes', start=40, columns=columns),
+        'tags_first_approach': count_tags(data['tags'], method='literal').head(15),
+        'tags_second_approach': count_tags(data['tags'], method='regex').head(15),
+    }
+
+
+def table_digest(table, function):
+    """Return a hash of ``table`` and of the function drawing it."""
+    digest = hashlib.sha256(function.encode())
+    columns = table.columns if isinstance(table, pd.DataFrame) else [table.name]
+    digest.update(repr(list(columns)).encode())
+    digest.update(pd.util.hash_pandas_object(table, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _render(function, table, path):
+    from . import plots
+    getattr(plots, function)(table, path)
+    return path
+
+
+def _read_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST)) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def render_report(tables, output, formats=('png',), workers=None):
+    """Render the charts of ``tables`` to ``output/<name>.<format>``.
+
+    Returns the paths that were rendered; the others were up to date.
+    """
+    os.makedirs(output, exist_ok=True)
+    manifest = _read_manifest(output)
+    jobs = {}
+    for name, table in tables.items():
+        function = FIGURES[name]
+        digest = table_digest(table, function)
+        for extension in formats:
+            path = os.path.join(output, '%s.%s' % (name, extension))
+            if manifest.get(os.path.basename(path)) == digest and os.path.exists(path):
+                continue
+            jobs[path] = (function, table, digest)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(_render, function, table, path)
+                       for path, (function, table, _) in jobs.items()}
+            for path, future in futures.items():
+                future.result()
+                manifest[os.path.basename(path)] = jobs[path][2]
+        tmp_path = os.path.join(output, MANIFEST + '.tmp')
+        with open(tmp_path, 'w') as handle:
+            json.dump(manifest, handle, indent=1, sort_keys=True)
+        os.replace(tmp_path, os.path.join(output, MANIFEST))
+    return sorted(jobs)
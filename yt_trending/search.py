@@ -0,0 +1,209 @@
+"""Inverted index of the tag and title words, for filtered queries.
+
+Finding the videos tagged with a word, or with a word in their title, needs
+a ``str.contains`` scan of the whole column in the notebook. Here the
+``tags`` and ``title`` columns are split into lowercased words once, and
+every word is mapped to the sorted array of the positions of the rows it
+appears in (its posting list). A query is then a few intersections and
+unions of sorted integer arrays, combined with conditions on the numeric
+columns::
+
+    index = InvertedIndex(data)
+    rows = index.search(tags=['humour'], where=['comment_count > 1000'])
+    data.iloc[rows]
+
+Tags are whole tags (``first|"second"`` gives ``first`` and ``second``), the
+titles are split into words on everything that is not a letter or a digit.
+"""
+
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+from .tags import NO_TAGS, REGEX_DELIMITER
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = None
+
+FIELDS = ('tags', 'title')
+# Separators of the title words, for Arrow (RE2) and for python regular expressions.
+TITLE_DELIMITER = r'[^\p{L}\p{N}]+'
+PYTHON_TITLE_DELIMITER = r'[\W_]+'
+NUMERIC_COLUMNS = ('views', 'likes', 'dislikes', 'comment_count')
+
+_CONDITION = re.compile(r'\s*(\w+)\s*(>=|<=|==|>|<)\s*([-+\d.eE]+)\s*')
+_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+              '==': operator.eq}
+
+
+def _split(values, field):
+    """Return the row positions and the lowercased words of a text column."""
+    if field == 'tags':
+        arrow_pattern = python_pattern = REGEX_DELIMITER
+    else:
+        arrow_pattern, python_pattern = TITLE_DELIMITER, PYTHON_TITLE_DELIMITER
+    if pa is not None:
+        array = pa.array(values, type=pa.large_string(), from_pandas=True)
+        if field == 'tags':
+            array = pc.if_else(pc.equal(array, NO_TAGS), pa.scalar(None, pa.large_string()), array)
+        words = pc.split_pattern_regex(pc.utf8_lower(array), arrow_pattern)
+        parents = pc.list_parent_indices(words).to_numpy()
+        tokens = pc.list_flatten(words).to_numpy(zero_copy_only=False)
+    else:
+        values = pd.Series(values).reset_index(drop=True)
+        if field == 'tags':
+            values = values.where(values != NO_TAGS)
+        tokens = values.str.lower().str.split(python_pattern, regex=True).explode().dropna()
+        parents, tokens = tokens.index.to_numpy(), tokens.to_numpy(dtype=object)
+    nonempty = tokens != ''
+    return parents[nonempty], tokens[nonempty]
+
+
+def parse_condition(condition):
+    """Return ``(column, operator, value)`` of a condition like ``'comment_count > 1000'``.
+
+    Conditions apply to the :data:`NUMERIC_COLUMNS` only.
+    """
+    if isinstance(condition, str):
+        match = _CONDITION.fullmatch(condition)
+        if match is None:
+            raise ValueError('invalid condition %r, expected e.g. comment_count > 1000' % condition)
+        column, symbol, value = match.groups()
+        value = float(value) if any(c in value for c in '.eE') else int(value)
+    else:
+        column, symbol, value = condition
+        if symbol not in _OPERATORS:
+            raise ValueError('invalid operator %r, expected one of %s' % (symbol, ', '.join(_OPERATORS)))
+    if column not in NUMERIC_COLUMNS:
+        raise ValueError('conditions apply to %s, not %r' % (', '.join(NUMERIC_COLUMNS), column))
+    return column, symbol, value
+
+
+class Postings:
+    """Sorted row positions of every word of one text column."""
+
+    def __init__(self, values, field):
+        parents, tokens = _split(values, field)
+        codes, vocabulary = pd.factorize(tokens)
+        self.vocabulary = pd.Index(vocabulary, name=field)
+        # Sorted by word, then by row; a word repeated in a row is kept once.
+        order = np.lexsort((parents, codes))
+        codes, parents = codes[order], parents[order]
+        distinct = np.ones(len(codes), dtype=bool)
+        distinct[1:] = (codes[1:] != codes[:-1]) | (parents[1:] != parents[:-1])
+        codes = codes[distinct]
+        dtype = np.int32 if len(values) < 2 ** 31 else np.int64
+        self.rows = parents[distinct].astype(dtype)
+        self.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(vocabulary)), out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def __getitem__(self, word):
+        """Return the rows containing ``word`` (lowercased), an empty array if none."""
+        code = self.vocabulary.get_indexer([word.lower()])[0]
+        if code < 0:
+            return self.rows[:0]
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def frequencies(self):
+        """Return the number of rows of every word, the most frequent first."""
+        counts = np.diff(self.offsets)
+        order = np.argsort(-counts, kind='stable')
+        return pd.Series(counts[order], index=self.vocabulary[order], name='count')
+
+
+def intersect(arrays):
+    """Return the values present in every sorted array, shortest arrays first."""
+    arrays = sorted(arrays, key=len)
+    result = arrays[0]
+    for array in arrays[1:]:
+        if not len(result):
+            break
+        result = result[np.isin(result, array, assume_unique=True, kind='sort')]
+    return result
+
+
+def union(arrays):
+    """Return the sorted values present in any of the sorted arrays."""
+    return np.unique(np.concatenate(arrays)) if arrays else np.empty(0, dtype=np.int64)
+
+
+class InvertedIndex:
+    """Posting lists of the tag and title words of ``frame``, and sorted numeric columns.
+
+    ``search`` returns row positions, in increasing order, for ``frame.iloc``.
+    """
+
+    def __init__(self, frame, fields=FIELDS):
+        self.frame = frame
+        self.postings = {field: Postings(frame[field], field) for field in fields}
+        self._sorted = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def rows(self, field, words, how='all'):
+        """Return the rows with all (or any, with ``how='any'``) of ``words`` in ``field``."""
+        postings = self.postings[field]
+        lists = [postings[word] for word in words]
+        return intersect(lists) if how == 'all' else union(lists)
+
+    def _sorted_column(self, column):
+        # Values and row order of a numeric column, sorted once per column.
+        if column not in self._sorted:
+            values = self.frame[column].to_numpy()
+            order = np.argsort(values, kind='stable')
+            self._sorted[column] = values[order], order
+        return self._sorted[column]
+
+    def where(self, condition, rows=None):
+        """Return the rows satisfying ``condition``, among ``rows`` when given.
+
+        Candidate rows are checked one by one; without candidates the column
+        is binary searched in its sorted values instead of scanned.
+        """
+        column, symbol, value = parse_condition(condition)
+        if rows is not None:
+            values = self.frame[column].to_numpy()[rows]
+            return rows[_OPERATORS[symbol](values, value)]
+        values, order = self._sorted_column(column)
+        left = np.searchsorted(values, value, side='left')
+        right = np.searchsorted(values, value, side='right')
+        selected = {'>': order[right:], '>=': order[left:], '<': order[:left],
+                    '<=': order[:right], '==': order[left:right]}[symbol]
+        return np.sort(selected)
+
+    def search(self, tags=(), title=(), any_tags=(), any_title=(), where=()):
+        """Return the rows matching every given constraint.
+
+        ``tags`` and ``title`` are words that must all be present, ``any_tags``
+        and ``any_title`` words of which at least one must be, and ``where``
+        conditions on the numeric columns such as ``'comment_count > 1000'``.
+        """
+        lists = []
+        for field, words, how in (('tags', tags, 'all'), ('title', title, 'all'),
+                                  ('tags', any_tags, 'any'), ('title', any_title, 'any')):
+            if words:
+                lists.append(self.rows(field, [words] if isinstance(words, str) else words, how))
+        where = [where] if isinstance(where, str) else list(where)
+        if lists:
+            rows = intersect(lists)
+        elif where:
+            rows = self.where(where.pop(0))
+        else:
+            return np.arange(len(self.frame))
+        for condition in where:
+            rows = self.where(condition, rows)
+        return rows
+
+    def take(self, rows, columns=None):
+        """Return the rows at the positions ``rows``, with only ``columns`` when given."""
+        frame = self.frame if columns is None else self.frame[list(columns)]
+        return frame.iloc[rows]
@@ -0,0 +1,338 @@
+"""Local query service keeping the dataset in memory.
+
+Every question asked to the notebook or to the command line loads the csv
+again. :func:`serve` loads it once, answers json queries over HTTP on a local
+port or on a unix socket, and loads the csv again when it changes::
+
+    python -m yt_trending serve FRvideos.csv --port 8765
+    curl 'localhost:8765/top?k=50&by=comment_count'
+    curl 'localhost:8765/channels?threshold=1000&channel=Troom+Troom+FR'
+    curl 'localhost:8765/tags?k=15'
+    curl 'localhost:8765/vcp'
+    curl 'localhost:8765/search?tag=humour&where=comment_count+>+1000'
+    curl 'localhost:8765/status'
+
+The server runs on asyncio; the queries run in a thread pool, so that a slow
+query does not hold up the others. Results are memoized per version of the
+data (see :mod:`yt_trending.memo`); every result is computed once, by the
+first query asking for it, without holding up queries for other results. The
+word index of /search and the tag counts, channel statistics and VCP summary
+of the default parameters are computed right after loading, and the ranked
+index of every /top sort order the first time it is asked for.
+A background task checks the size and mtime of the csv every few seconds;
+when they change, the new data is loaded and indexed while the old one keeps
+answering, and then replaces it. Nothing but the standard library, pandas and
+the package is used: the service does not reach any other process or host.
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .analysis import top_videos, vcp_summary
+from .cache import fingerprint, load_cached
+from .channels import channel_stats
+from .memo import ResultCache
+from .ranking import RankedIndex
+from .search import InvertedIndex
+from .store import SORT_COLUMNS, TOP_COLUMNS
+from .tags import count_tags
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL = 2.0
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+
+class QueryError(ValueError):
+    """An invalid query, answered with a 400 status."""
+
+
+class _Once:
+    """A value computed by the first thread asking for it, the others waiting for it."""
+
+    def __init__(self, compute):
+        self.compute = compute
+        self.done = False
+        self.value = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if not self.done:
+                self.value = self.compute()
+                self.done = True
+            return self.value
+
+
+class Dataset:
+    """One loaded version of the csv, with its memoized results and word index.
+
+    ``_lock`` only guards the result cache and the table of results being
+    computed; results are computed outside of it.
+    """
+
+    def __init__(self, path, max_bytes='256MB'):
+        stat = fingerprint(path, with_hash=False)
+        self.path = path
+        self.version = '%d-%d' % (stat['size'], stat['mtime_ns'])
+        self.frame = load_cached(path)
+        self.loaded_at = time.time()
+        self.results = ResultCache(max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        # Key of the results being computed -> their _Once.
+        self._pending = {}
+        self._index = _Once(lambda: InvertedIndex(self.frame))
+
+    def cached(self, function, columns, **params):
+        """Return ``function(frame, **params)``, computed once for every query asking for it."""
+        with self._lock:
+            key = self.results.key(function, self.frame, columns, version=self.version, **params)
+            found, result = self.results.lookup(key)
+            if found:
+                return result
+            once = self._pending.get(key)
+            if once is None:
+                once = self._pending[key] = _Once(lambda: function(self.frame, **params))
+        try:
+            result = once()
+        finally:
+            with self._lock:
+                if self._pending.get(key) is once:
+                    del self._pending[key]
+                    if once.done:
+                        self.results.store(key, once.value)
+        return result
+
+    @property
+    def index(self):
+        return self._index()
+
+    def ranked(self, by, ascending):
+        """Return the :class:`RankedIndex` of the frame by ``by``."""
+        return self.cached(_ranked_index, list(dict.fromkeys(by)), by=tuple(by), ascending=tuple(ascending))
+
+    def warm(self):
+        """Compute the word index and the results of the default queries."""
+        self.index
+        self.cached(_tag_counts, ['tags'], method='regex')
+        self.cached(channel_stats, ['channel_title', 'comment_count'], thresholds=(1000,))
+        self.cached(vcp_summary, ['views', 'comment_count'])
+        return self
+
+
+def _tag_counts(frame, method='regex'):
+    return count_tags(frame['tags'], method=method)
+
+
+def _ranked_index(frame, by, ascending):
+    return RankedIndex(frame, list(by), list(ascending))
+
+
+def _one(params, name, default=None, type=str):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        return type(values[-1])
+    except ValueError:
+        raise QueryError('invalid %s: %r' % (name, values[-1])) from None
+
+
+def _boolean(value):
+    return value.lower() in ('1', 'true', 'yes', 'asc')
+
+
+def _records(frame):
+    return frame.reset_index().to_dict(orient='records')
+
+
+def query_top(data, params):
+    by = params.get('by') or ['comment_count']
+    unknown = set(by) - set(SORT_COLUMNS)
+    if unknown:
+        raise QueryError('cannot sort by %s, only by %s'
+                         % (', '.join(sorted(unknown)), ', '.join(SORT_COLUMNS)))
+    ascending = [_boolean(value) for value in params.get('ascending', ['false'])]
+    if len(ascending) not in (1, len(by)):
+        raise QueryError('ascending must be given once or once per sort column')
+    start = _one(params, 'start', 0, int)
+    # The first rows by a single column are a partial sort, cheaper than an index.
+    index = None if len(by) == 1 and start == 0 else data.ranked(by, ascending)
+    videos = top_videos(data.frame, k=_one(params, 'k', 10, int), by=by,
+                        ascending=ascending[0] if len(ascending) == 1 else ascending,
+                        start=start, columns=TOP_COLUMNS, index=index)
+    return _records(videos)
+
+
+def query_channels(data, params):
+    thresholds = tuple(int(value) for value in params.get('threshold', ['1000']))
+    table = data.cached(channel_stats, ['channel_title', 'comment_count'], thresholds=thresholds)
+    channel = _one(params, 'channel')
+    if channel is not None:
+        if channel not in table.index:
+            raise QueryError('unknown channel %r' % channel)
+        table = table.loc[[channel]]
+    else:
+        k = _one(params, 'k', 20, int)
+        table = table.head(k) if k else table
+    return _records(table)
+
+
+def query_tags(data, params):
+    method = _one(params, 'method', 'regex')
+    if method not in ('regex', 'literal'):
+        raise QueryError('method must be regex or literal')
+    counts = data.cached(_tag_counts, ['tags'], method=method)
+    return [[tag, count] for tag, count in counts.head(_one(params, 'k', 15, int)).items()]
+
+
+def query_vcp(data, params):
+    return data.cached(vcp_summary, ['views', 'comment_count']).to_dict()
+
+
+def query_search(data, params):
+    rows = data.index.search(tags=params.get('tag', ()), title=params.get('title', ()),
+                             any_tags=params.get('any_tag', ()), any_title=params.get('any_title', ()),
+                             where=params.get('where', ()))
+    k = _one(params, 'k', 20, int)
+    return {'rows': len(rows), 'videos': _records(data.index.take(rows[:k], TOP_COLUMNS))}
+
+
+def query_status(data, params):
+    return {'path': data.path, 'version': data.version, 'rows': len(data.frame),
+            'loaded_at': datetime.datetime.fromtimestamp(data.loaded_at).isoformat(),
+            'results': data.results.stats()}
+
+
+QUERIES = {
+    '/top': query_top,
+    '/channels': query_channels,
+    '/tags': query_tags,
+    '/vcp': query_vcp,
+    '/search': query_search,
+    '/status': query_status,
+}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    raise TypeError('cannot serialize %r' % type(value))
+
+
+def answer(data, target):
+    """Return the status and json body of the query ``target``, e.g. ``/tags?k=15``."""
+    url = urlsplit(target)
+    query = QUERIES.get(url.path.rstrip('/') or '/status')
+    if query is None:
+        return 404, {'error': 'unknown query %s' % url.path, 'queries': sorted(QUERIES)}
+    try:
+        return 200, query(data, parse_qs(url.query))
+    except (QueryError, ValueError, KeyError) as error:
+        # Invalid numbers, unknown columns or conditions.
+        return 400, {'error': str(error)}
+
+
+class QueryServer:
+    """The current :class:`Dataset` of ``path`` and the asyncio handlers answering queries."""
+
+    def __init__(self, path, workers=None, reload_interval=RELOAD_INTERVAL, max_bytes='256MB'):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.max_bytes = max_bytes
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.data = None
+
+    async def load(self):
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self.executor, Dataset, self.path, self.max_bytes)
+        await loop.run_in_executor(self.executor, data.warm)
+        # Queries already running keep the previous dataset.
+        self.data = data
+        return data
+
+    async def watch(self):
+        """Reload the dataset whenever the size or mtime of the csv changes."""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                stat = fingerprint(self.path, with_hash=False)
+            except OSError:
+                continue
+            if '%d-%d' % (stat['size'], stat['mtime_ns']) != self.data.version:
+                try:
+                    await self.load()
+                except Exception as error:  # keep serving the previous version
+                    print('reload of %s failed: %s' % (self.path, error))
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2:
+                status, body = 400, {'error': 'malformed request'}
+            elif parts[0] != 'GET':
+                status, body = 405, {'error': 'only GET is supported'}
+            else:
+                loop = asyncio.get_running_loop()
+                try:
+                    status, body = await loop.run_in_executor(self.executor, answer, self.data, parts[1])
+                except Exception as error:
+                    status, body = 500, {'error': '%s: %s' % (type(error).__name__, error)}
+            payload = json.dumps(body, default=_json_default).encode()
+            writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n'
+                          'Content-Length: %d\r\nConnection: close\r\n\r\n'
+                          % (status, _REASONS[status], len(payload))).encode() + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+        await self.load()
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            where = socket_path
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            where = 'http://%s:%d' % (host, port)
+        print('serving %s (%d rows) on %s' % (self.path, len(self.data.frame), where), flush=True)
+        watcher = asyncio.create_task(self.watch()) if self.reload_interval else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self.executor.shutdown(wait=False)
+
+
+def serve(path, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, workers=None,
+          reload_interval=RELOAD_INTERVAL):
+    """Serve the queries of the csv ``path`` until interrupted."""
+    server = QueryServer(path, workers=workers, reload_interval=reload_interval)
+    try:
+        asyncio.run(server.serve(host, port, socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
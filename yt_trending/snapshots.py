@@ -0,0 +1,79 @@
+"""One row per video: the latest (or peak) trending snapshot of every ``video_id``.
+
+A video trending on several days has one row per ``trending_date``, so
+``nlargest(50, 'comment_count')``, the channel counts and the tag counts
+count it several times. :class:`SnapshotIndex` finds the row to keep for every
+video with a single ``np.lexsort`` of the ``video_id`` codes and the trending
+date (or the peak column), and stores only the positions of those rows. The
+analyses then read the columns they need at those positions, without copying
+the whole frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .channels import channel_counts
+from .ranking import top_positions
+from .tags import count_tags
+
+KEEP = ('latest', 'peak')
+
+
+class SnapshotIndex:
+    """Positions of the rows of ``frame`` kept for every ``video_id``.
+
+    With ``keep='latest'`` the row with the last ``trending_date`` is kept,
+    with ``keep='peak'`` the row with the largest ``by`` column. Ties go to
+    the last row of the frame.
+    """
+
+    def __init__(self, frame, keep='latest', by='views'):
+        if keep not in KEEP:
+            raise ValueError('keep must be one of %s, not %r' % (KEEP, keep))
+        self.frame = frame
+        self.keep = keep
+        codes, self.video_ids = pd.factorize(frame['video_id'].to_numpy())
+        if keep == 'latest':
+            secondary = frame['trending_date'].to_numpy().view(np.int64)
+        else:
+            secondary = frame[by].to_numpy()
+        # lexsort is stable: within a video, rows are sorted by the secondary
+        # key, then by position, so the last row of every block is the one kept.
+        order = np.lexsort((secondary, codes))
+        sorted_codes = codes[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = sorted_codes[1:] != sorted_codes[:-1]
+        last &= sorted_codes >= 0
+        self.positions = np.sort(order[last])
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def mask(self):
+        """Boolean mask of the kept rows of the frame."""
+        mask = np.zeros(len(self.frame), dtype=bool)
+        mask[self.positions] = True
+        return mask
+
+    def column(self, name):
+        """Return the column ``name`` restricted to the kept rows."""
+        return self.frame[name].iloc[self.positions]
+
+    def take(self, columns=None):
+        """Materialize the kept rows, with only ``columns`` when given."""
+        frame = self.frame if columns is None else self.frame[list(columns)]
+        return frame.iloc[self.positions]
+
+    def nlargest(self, k, column):
+        """Return the ``k`` videos with the largest ``column``, like ``data.nlargest``."""
+        values = self.frame[column].to_numpy()[self.positions]
+        return self.frame.iloc[self.positions[top_positions(values, k)]]
+
+    def channel_counts(self):
+        """Return the number of distinct videos of every channel, largest first."""
+        return channel_counts(self.take(['channel_title']))
+
+    def tag_counts(self, method='regex'):
+        """Return the tag counts with every video counted once."""
+        return count_tags(self.column('tags'), method=method)
@@ -0,0 +1,186 @@
+"""Aggregates updated day by day as new trending snapshots arrive.
+
+Rerunning every analysis over the full csv each day repeats the sort, the VCP
+column, the tag counts and the channel groupby over rows that did not change.
+:class:`AggregateStore` keeps the state these results are derived from:
+
+- per-channel video counts, and counts above each comment threshold;
+- per-tag counts, in ``Counter`` order;
+- the top ``k`` rows by comment_count and by likes;
+- the count, mean, variance, minimum and maximum of the VCP.
+
+Ingesting new rows only touches the channels and tags of those rows, the
+``k`` rows kept for each ranking and the VCP moments, so it costs time
+proportional to the new rows. The results are the ones a full recompute over
+all the ingested rows would give. Every ``trending_date`` can only be
+ingested once.
+"""
+
+import os
+import pickle
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .analysis import vcp
+from .channels import TOTAL_COLUMN, count_column, with_percentages
+from .loader import DEFAULT_CHUNKSIZE, iter_videos
+from .ranking import top_positions
+from .tags import count_tags
+
+TOP_COLUMNS = ['video_id', 'trending_date', 'title', 'channel_title',
+               'views', 'likes', 'dislikes', 'comment_count']
+# The columns of TOP_COLUMNS rows can be ranked by.
+SORT_COLUMNS = ['trending_date', 'views', 'likes', 'dislikes', 'comment_count']
+RANKED_COLUMNS = ['comment_count', 'likes']
+# Columns read by the store.
+STORE_COLUMNS = TOP_COLUMNS + ['tags']
+
+_FORMAT_VERSION = 1
+
+
+class AggregateStore:
+    """Incrementally maintained aggregates of the ingested trending rows."""
+
+    def __init__(self, thresholds=(1000,), k=50, method='regex'):
+        self.thresholds = list(thresholds)
+        self.k = k
+        self.method = method
+        self.dates = set()
+        self.rows = 0
+        self.channel_totals = Counter()
+        self.channel_above = {t: Counter() for t in self.thresholds}
+        self.tag_counts = Counter()
+        self.top_rows = {column: None for column in RANKED_COLUMNS}
+        # Count, mean and sum of squared deviations of the finite VCP values.
+        self.vcp_moments = (0, 0.0, 0.0)
+        self.vcp_range = (np.inf, -np.inf)
+
+    def ingest(self, frame):
+        """Add the rows of ``frame``; its trending dates must all be new."""
+        dates = set(pd.to_datetime(frame['trending_date'].unique()))
+        already = dates & self.dates
+        if already:
+            raise ValueError('trending dates already ingested: %s'
+                             % ', '.join(sorted(str(d.date()) for d in already)))
+        self._ingest_channels(frame)
+        self.tag_counts.update(count_tags(frame['tags'], method=self.method, sort=False).to_dict())
+        for column in RANKED_COLUMNS:
+            self._ingest_top(frame, column)
+        self._ingest_vcp(frame)
+        self.dates |= dates
+        self.rows += len(frame)
+        return self
+
+    def ingest_csv(self, path, chunksize=DEFAULT_CHUNKSIZE):
+        """Ingest a csv of new trending days, chunk by chunk."""
+        return self.ingest_chunks(iter_videos(path, chunksize=chunksize, usecols=STORE_COLUMNS))
+
+    def ingest_chunks(self, chunks):
+        """Ingest consecutive chunks of the same dataset.
+
+        Unlike separate calls to :meth:`ingest`, a trending date may be
+        spread over several chunks.
+        """
+        new_dates = set()
+        for chunk in chunks:
+            # A day may be split over two chunks of the same file.
+            chunk_dates = set(pd.to_datetime(chunk['trending_date'].unique()))
+            self.dates -= chunk_dates & new_dates
+            self.ingest(chunk)
+            new_dates |= chunk_dates
+        return self
+
+    def _ingest_channels(self, frame):
+        values = frame['comment_count'].to_numpy()
+        has_value = pd.notna(values)
+        channels = np.asarray(frame['channel_title'], dtype=object)[has_value]
+        codes, uniques = pd.factorize(channels)
+        values = values[has_value][codes >= 0]
+        codes = codes[codes >= 0]
+        self.channel_totals.update(dict(zip(uniques, np.bincount(codes, minlength=len(uniques)))))
+        for t in self.thresholds:
+            # Channels without any video above t still get a (zero) counter.
+            above = np.bincount(codes[values > t], minlength=len(uniques))
+            self.channel_above[t].update(dict(zip(uniques, above)))
+
+    def _ingest_top(self, frame, column):
+        new = frame.iloc[top_positions(frame[column].to_numpy(), self.k)]
+        new = new[[c for c in TOP_COLUMNS if c in new]].reset_index(drop=True)
+        if 'channel_title' in new:
+            new['channel_title'] = new['channel_title'].astype(object)
+        current = self.top_rows[column]
+        # Kept rows come first, so ties still go to the row ingested first.
+        merged = new if current is None else pd.concat([current, new], ignore_index=True)
+        self.top_rows[column] = merged.iloc[top_positions(merged[column].to_numpy(), self.k)] \
+            .reset_index(drop=True)
+
+    def _ingest_vcp(self, frame):
+        values = vcp(frame).to_numpy(dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        count, mean, m2 = self.vcp_moments
+        new_count, new_mean = len(values), values.mean()
+        new_m2 = ((values - new_mean) ** 2).sum()
+        # Chan et al. pairwise update of the mean and the squared deviations.
+        total = count + new_count
+        delta = new_mean - mean
+        mean += delta * new_count / total
+        m2 += new_m2 + delta ** 2 * count * new_count / total
+        self.vcp_moments = (total, mean, m2)
+        low, high = self.vcp_range
+        self.vcp_range = (min(low, values.min()), max(high, values.max()))
+
+    def channel_counts(self):
+        """Return the number of videos of every channel, largest first, ties by channel name."""
+        counts = pd.Series(self.channel_totals, dtype=np.int64, name='count')
+        counts.index.name = 'channel_title'
+        return counts.sort_index().sort_values(ascending=False, kind='stable')
+
+    def channel_stats(self):
+        """Return the table of :func:`yt_trending.channels.channel_stats` for the ingested rows."""
+        totals = pd.Series(self.channel_totals, dtype=np.int64).sort_index()
+        table = pd.DataFrame({count_column('comment_count', t):
+                              pd.Series(self.channel_above[t], dtype=np.int64).reindex(totals.index)
+                              for t in self.thresholds})
+        table[TOTAL_COLUMN] = totals
+        table.index.name = 'channel_title'
+        return with_percentages(table, self.thresholds)
+
+    def most_common_tags(self, k=None):
+        """Return the ``k`` most common tags, like :func:`yt_trending.tags.count_tags`."""
+        counts = pd.Series(dict(self.tag_counts.most_common(k)), dtype=np.int64, name='count')
+        counts.index.name = 'tag'
+        return counts
+
+    def top(self, column, k=None):
+        """Return the ``k`` (at most ``self.k``) ingested rows with the largest ``column``."""
+        return self.top_rows[column].head(self.k if k is None else min(k, self.k))
+
+    def vcp_summary(self):
+        """Return the count, mean, std, min and max of the finite VCP values."""
+        count, mean, m2 = self.vcp_moments
+        std = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+        low, high = self.vcp_range if count else (np.nan, np.nan)
+        return pd.Series({'count': count, 'mean': mean if count else np.nan,
+                          'std': std, 'min': low, 'max': high}, name='VCP')
+
+    def save(self, path):
+        """Write the store to ``path``, atomically."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as handle:
+            pickle.dump((_FORMAT_VERSION, self.__dict__), handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a store written by :meth:`save`."""
+        with open(path, 'rb') as handle:
+            version, state = pickle.load(handle)
+        if version != _FORMAT_VERSION:
+            raise ValueError('unsupported store format %r' % version)
+        store = cls.__new__(cls)
+        store.__dict__.update(state)
+        return store
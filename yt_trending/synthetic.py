@@ -0,0 +1,140 @@
+"""Synthetic youtube trending dumps with the columns of ``FRvideos.csv``.
+
+The real dumps cannot be shared, so benchmarks run on generated data that
+follows their shape:
+
+- channels and tagging words are drawn from Zipf distributions, so that a few
+  channels publish most trending videos and a few words tag most of them;
+- tags are written like the real ones, ``first|"second"|"third"``, with
+  ``[none]`` for untagged videos and a few missing values;
+- every video trends for a geometric number of consecutive days, with one row
+  per day, and its views grow linearly from day to day;
+- views are log-normal, and likes, dislikes and comments heavy-tailed
+  fractions of them.
+
+Rows are generated chunk by chunk, so files from 40k to tens of millions of
+rows can be written with bounded memory.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .loader import COLUMNS, DATE_FORMATS
+
+CATEGORIES = np.array([1, 2, 10, 15, 17, 19, 20, 22, 23, 24, 25, 26, 27, 28, 29, 30, 43, 44])
+CATEGORY_WEIGHTS = np.array([6, 2, 14, 2, 8, 1, 6, 12, 12, 24, 6, 5, 3, 2, 1, 1, 1, 1], dtype=float)
+FIRST_DAY = pd.Timestamp('2017-11-14')
+DAYS = 210
+MEAN_DAYS_TRENDING = 4.0
+CHUNK_ROWS = 500_000
+ZIPF_EXPONENT = 1.1
+
+_ID_ALPHABET = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'))
+
+
+def _zipf_sampler(rng, size, exponent=ZIPF_EXPONENT):
+    """Return a function drawing ranks in ``[0, size)`` with Zipf probabilities."""
+    cumulative = np.cumsum(1.0 / np.arange(1, size + 1) ** exponent)
+    cumulative /= cumulative[-1]
+    return lambda n: np.minimum(np.searchsorted(cumulative, rng.random(n)), size - 1)
+
+
+def _tag_strings(rng, draw_word, vocabulary, n):
+    counts = rng.poisson(8, n)
+    words = vocabulary[draw_word(int(counts.sum()))]
+    bounds = np.r_[0, np.cumsum(counts)]
+    tags = np.empty(n, dtype=object)
+    for i in range(n):
+        row = words[bounds[i]:bounds[i + 1]]
+        tags[i] = row[0] + ''.join('|"%s"' % word for word in row[1:]) if len(row) else '[none]'
+    missing = rng.random(n) < 0.001
+    tags[missing] = np.nan
+    tags[rng.random(n) < 0.05] = '[none]'
+    return tags
+
+
+def generate(rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Yield frames of synthetic trending rows, ``rows`` in total.
+
+    The frames have the columns of the csv, with the values as strings and
+    numbers as they are written in the file.
+    """
+    rng = np.random.default_rng(seed)
+    channels = np.array(['channel %d' % i for i in range(max(rows // 25, 10))], dtype=object)
+    vocabulary = np.array(['tag%d' % i if i % 7 else 'Tag %d' % i
+                           for i in range(max(rows // 4, 100))], dtype=object)
+    draw_channel = _zipf_sampler(rng, len(channels))
+    draw_word = _zipf_sampler(rng, len(vocabulary))
+    category_weights = CATEGORY_WEIGHTS / CATEGORY_WEIGHTS.sum()
+
+    produced = 0
+    while produced < rows:
+        target = min(chunk_rows, rows - produced)
+        videos = max(int(target / MEAN_DAYS_TRENDING), 1)
+        days = rng.geometric(1 / MEAN_DAYS_TRENDING, videos)
+        video = np.repeat(np.arange(videos), days)[:target]
+        videos = video[-1] + 1
+        days = np.bincount(video, minlength=videos)
+        day_of_run = np.arange(len(video)) - np.repeat(np.r_[0, np.cumsum(days)[:-1]], days)
+
+        ids = np.ascontiguousarray(rng.choice(_ID_ALPHABET, size=(videos, 11))).view('U11').ravel()
+        first_day = rng.integers(0, DAYS, videos)
+        trending = FIRST_DAY + pd.to_timedelta(first_day[video] + day_of_run, unit='D')
+        published = FIRST_DAY + pd.to_timedelta(first_day - rng.exponential(2, videos), unit='D')
+
+        views0 = rng.lognormal(11, 1.6, videos)
+        daily_growth = rng.gamma(2, 0.2, videos)
+        views = (views0[video] * (1 + daily_growth[video] * day_of_run)).astype(np.int64)
+        likes = (views * rng.beta(2, 60, videos)[video]).astype(np.int64)
+        dislikes = (likes * rng.beta(1, 20, videos)[video]).astype(np.int64)
+        comments = (views * rng.lognormal(-5.5, 1.0, videos)[video]).astype(np.int64)
+
+        channel = channels[draw_channel(videos)]
+        frame = pd.DataFrame({
+            'video_id': ids.astype(object)[video],
+            'trending_date': trending.strftime(DATE_FORMATS['trending_date']),
+            'title': np.char.add('video ', ids)[video],
+            'channel_title': channel[video],
+            'category_id': rng.choice(CATEGORIES, videos, p=category_weights)[video],
+            'publish_time': published.strftime('%Y-%m-%dT%H:%M:%S.000Z')[video],
+            'tags': _tag_strings(rng, draw_word, vocabulary, videos)[video],
+            'views': views,
+            'likes': likes,
+            'dislikes': dislikes,
+            'comment_count': comments,
+            'thumbnail_link': np.char.add(np.char.add('https://i.ytimg.com/vi/', ids),
+                                          '/default.jpg')[video],
+            'comments_disabled': (rng.random(videos) < 0.01)[video],
+            'ratings_disabled': (rng.random(videos) < 0.005)[video],
+            'video_error_or_removed': (rng.random(videos) < 0.0005)[video],
+            'description': np.char.add('description of ', ids)[video],
+        }, columns=COLUMNS)
+        # The dumps are written day after day.
+        frame = frame.iloc[np.argsort(trending.to_numpy(), kind='stable')]
+        produced += len(frame)
+        yield frame.reset_index(drop=True)
+
+
+def write_csv(path, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Write a synthetic dump of ``rows`` rows to ``path``."""
+    header = True
+    with open(path, 'w', newline='') as handle:
+        for frame in generate(rows, seed=seed, chunk_rows=chunk_rows):
+            frame.to_csv(handle, header=header, index=False)
+            header = False
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--rows', '-n', type=int, default=40_724)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_csv(args.path, args.rows, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Trending trajectory of every video: daily gains, peak day and days trending.
+
+The rows are sorted once by ``video_id`` code and ``trending_date`` with
+``np.lexsort``; every video is then a contiguous block of rows, and all the
+per-video quantities are computed with segment-wise numpy operations on the
+block boundaries (``np.diff``, ``np.maximum.reduceat``, ``np.bincount``),
+without grouping the frame or calling python code per video.
+"""
+
+import numpy as np
+import pandas as pd
+
+TRAJECTORY_COLUMNS = ['views', 'likes', 'comment_count']
+
+
+def _segment_argmax(codes, values):
+    """Return, for every block of equal ``codes``, the position of its largest value."""
+    order = np.lexsort((values, codes))
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = codes[order][1:] != codes[order][:-1]
+    return order[last]
+
+
+class Trajectories:
+    """Per-day and per-video trajectories of ``columns`` in ``frame``.
+
+    ``daily`` has one row per snapshot, sorted by video and date, with the
+    value, the gain since the previous snapshot (``_delta``) and the relative
+    gain (``_growth``) of every column; the first snapshot of a video has no
+    gain. ``summary`` has one row per ``video_id`` with the first and last
+    trending dates, the number of days trending, the longest run of
+    consecutive days, the number of times the video came back to the list,
+    and for every column the total gain, the largest daily gain and the day
+    it happened.
+
+    Both tables can be joined to the data frame, e.g.
+    ``data.join(trajectories.summary, on='video_id')``.
+    """
+
+    def __init__(self, frame, columns=TRAJECTORY_COLUMNS):
+        self.columns = list(columns)
+        codes, video_ids = pd.factorize(frame['video_id'].to_numpy())
+        days = frame['trending_date'].to_numpy().astype('datetime64[D]').view(np.int64)
+        order = np.lexsort((days, codes))
+        order = order[codes[order] >= 0]
+        codes, days = codes[order], days[order]
+        n = len(order)
+
+        new_video = np.ones(n, dtype=bool)
+        new_video[1:] = codes[1:] != codes[:-1]
+        starts = np.flatnonzero(new_video)
+        # Without rows there is no video, and no end either.
+        ends = np.r_[starts[1:], n][:len(starts)] - 1
+        gap = np.zeros(n, dtype=np.int64)
+        gap[1:] = days[1:] - days[:-1]
+        # A run of consecutive trending days ends when a day is skipped.
+        new_run = new_video | (gap > 1)
+        run_ids = np.cumsum(new_run) - 1
+        run_lengths = np.bincount(run_ids)[run_ids]
+
+        daily = {
+            'video_id': video_ids[codes],
+            'trending_date': days.astype('datetime64[D]'),
+        }
+        summary = {
+            'first_trending': days[starts].astype('datetime64[D]'),
+            'last_trending': days[ends].astype('datetime64[D]'),
+            'days_trending': np.diff(np.r_[starts, n]).astype(np.uint32),
+            'longest_run': np.maximum.reduceat(run_lengths, starts).astype(np.uint32),
+            'comebacks': (np.add.reduceat(new_run, starts) - 1).astype(np.uint32),
+        }
+        for column in self.columns:
+            raw = frame[column].to_numpy()[order]
+            values = raw.astype(np.float64)
+            delta = np.empty(n)
+            delta[1:] = values[1:] - values[:-1]
+            delta[new_video] = np.nan
+            previous = np.r_[np.nan, values[:-1]]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                growth = np.where(previous > 0, delta / previous, np.nan)
+            daily[column] = raw
+            daily[column + '_delta'] = delta
+            daily[column + '_growth'] = growth.astype(np.float32)
+
+            peak = _segment_argmax(codes, np.where(np.isnan(delta), -np.inf, delta))
+            summary[column + '_gain'] = values[ends] - values[starts]
+            summary[column + '_peak_gain'] = delta[peak]
+            summary[column + '_peak_day'] = days[peak].astype('datetime64[D]')
+
+        self.order = order
+        self.daily = pd.DataFrame(daily)
+        self.summary = pd.DataFrame(summary, index=pd.Index(video_ids, name='video_id'))